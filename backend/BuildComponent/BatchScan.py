@@ -0,0 +1,100 @@
+import os
+import time
+import logging
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from . import OcrPool
+from . import PDFBuild
+
+# Manifests scanned at once; each worker process scans one manifest at a time
+BATCH_WORKERS = int(os.environ.get("MORGO_BATCH_WORKERS", os.cpu_count() or 1))
+
+_batch_pool = None
+_batch_pool_lock = threading.Lock()
+
+
+def _init_worker():
+    # The batch pool already uses every core, so each worker OCRs and runs
+    # Camelot in its own process instead of starting pools of its own
+    OcrPool.OCR_WORKERS = 0
+    PDFBuild.DRIVER_WORKERS = 1
+
+
+def _get_batch_pool():
+    global _batch_pool
+    with _batch_pool_lock:
+        if _batch_pool is None:
+            _batch_pool = ProcessPoolExecutor(max_workers=BATCH_WORKERS, initializer=_init_worker)
+        return _batch_pool
+
+
+def _reset_pool(pool):
+    global _batch_pool
+    with _batch_pool_lock:
+        if _batch_pool is pool:
+            _batch_pool = None
+    pool.shutdown(wait=False)
+
+
+def _failed(error):
+    return {"company": "", "drivers": "", "items": [], "sources": {}, "seconds": None, "error": error}
+
+
+def _scan(pdf_file, confidence_threshold):
+    # Runs inside a pool worker
+    start = time.perf_counter()
+    try:
+        result = PDFBuild.extract_data(pdf_file, confidence_threshold)
+    except Exception as e:
+        result = _failed(f"Error processing PDF: {str(e)}")
+    result["seconds"] = round(time.perf_counter() - start, 3)
+    return result
+
+
+def scan_batch(pdf_files, confidence_threshold=None):
+    """
+    Scan several manifests in parallel, one per worker process.
+    A manifest that fails, or that takes its worker process down with it,
+    gets an "error" entry and does not fail the rest of the batch.
+    Args:
+        pdf_files (list): Paths to the PDF files.
+        confidence_threshold (float): Passed through to extract_data.
+    Returns:
+        list: extract_data's result for each file, in the order given, with
+        the seconds spent scanning it.
+    """
+    if not pdf_files:
+        return []
+
+    if BATCH_WORKERS <= 1 or len(pdf_files) == 1:
+        return [_scan(pdf_file, confidence_threshold) for pdf_file in pdf_files]
+
+    pool = _get_batch_pool()
+    futures = [pool.submit(_scan, pdf_file, confidence_threshold) for pdf_file in pdf_files]
+    results = []
+    retry = []
+    for index, future in enumerate(futures):
+        try:
+            results.append(future.result())
+        except BrokenProcessPool:
+            results.append(None)
+            retry.append(index)
+
+    # A worker that dies takes every pending scan with it, so rescan those one
+    # at a time on a fresh pool to find the manifest that caused it
+    broken = bool(retry)
+    for index in retry:
+        if broken:
+            _reset_pool(pool)
+            pool = _get_batch_pool()
+        try:
+            results[index] = pool.submit(_scan, pdf_files[index], confidence_threshold).result()
+            broken = False
+        except BrokenProcessPool as e:
+            logging.error(f"Batch worker died while scanning {pdf_files[index]}: {str(e)}")
+            results[index] = _failed(f"Error processing PDF: worker process failed ({str(e)})")
+            broken = True
+    if broken:
+        _reset_pool(pool)
+    return results
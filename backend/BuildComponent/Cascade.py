@@ -0,0 +1,33 @@
+import os
+import logging
+
+# Minimum confidence (0-1) a tier must reach before the more expensive tiers are skipped
+CONFIDENCE_THRESHOLD = float(os.environ.get("MORGO_CONFIDENCE_THRESHOLD", 0.8))
+
+
+def run_cascade(field, tiers, threshold=None):
+    """
+    Try extraction tiers from cheapest to most expensive, stopping at the first
+    one whose confidence reaches the threshold.
+    Args:
+        field (str): Name of the field being extracted, for logging.
+        tiers (list): (tier name, callable) pairs. Each callable returns (value, confidence)
+            and receives the list of (tier, value, confidence) results gathered so far.
+        threshold (float): Confidence needed to stop; defaults to CONFIDENCE_THRESHOLD.
+    Returns:
+        tuple: (value, confidence, tier) from the accepted tier, or from the most
+        confident tier when none reached the threshold.
+    """
+    if threshold is None:
+        threshold = CONFIDENCE_THRESHOLD
+
+    attempts = []
+    for tier, extract in tiers:
+        value, confidence = extract(attempts)
+        attempts.append((tier, value, confidence))
+        logging.info(f"{field}: tier '{tier}' confidence {confidence:.2f}")
+        if confidence >= threshold:
+            return (value, confidence, tier)
+
+    tier, value, confidence = max(reversed(attempts), key=lambda attempt: attempt[2])
+    return (value, confidence, tier)
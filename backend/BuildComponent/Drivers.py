@@ -1,22 +1,46 @@
-import fitz  # PyMuPDF
-from pytesseract import pytesseract, Output
-from PIL import Image, ImageEnhance, ImageFilter
-import os
 import re
-import camelot
-import pdfplumber
+from .FieldLocator import read_value, values_right_of
 
-def extract_driver_names_with_camelot(pdf_path):
+# Confidence given to names found by each structural (non-OCR) strategy
+TEXT_LAYER_CONFIDENCE = 0.9
+PDFPLUMBER_CONFIDENCE = 0.85
+CAMELOT_CONFIDENCE = 0.7
+
+def extract_driver_names_from_text(doc):
+    """
+    Extracts driver names from the word boxes of the PDF text layer: the words
+    right of 'Name of Person Transporting' on the same line.
+    Args:
+        doc (ManifestDocument): The opened manifest.
+    Returns:
+        tuple: (filename, list of driver names, confidence).
+    """
+    filename = doc.filename
+    try:
+        driver_names = []
+        for page_number in range(min(2, doc.page_count)):
+            for value in values_right_of(doc.words(page_number), "Name of Person Transporting",
+                                         stop_label="Employee ID of Driver"):
+                name = re.sub(r"CCE\d+", "", value["text"]).strip()
+                if name:
+                    driver_names.append(name)
+
+        return (filename, driver_names, TEXT_LAYER_CONFIDENCE if driver_names else 0.0)
+
+    except Exception:
+        return (filename, [], 0.0)
+
+def extract_driver_names_with_camelot(doc):
     """
     Extracts driver names from table-based manifests using Camelot.
     Args:
-        pdf_path (str): Path to the PDF file.
+        doc (ManifestDocument): The opened manifest.
     Returns:
-        tuple: (filename, list of driver names).
+        tuple: (filename, list of driver names, confidence).
     """
-    filename = os.path.basename(pdf_path)
+    filename = doc.filename
     try:
-        tables = camelot.read_pdf(pdf_path, pages="1,2", flavor="stream")
+        tables = doc.camelot_tables(pages="1,2", flavor="stream")
         driver_names = []
 
         for table in tables:
@@ -30,90 +54,64 @@ def extract_driver_names_with_camelot(pdf_path):
                                 name = re.sub(r"Employee ID of Driver|CCE\d+", "", name).strip()
                                 driver_names.append(name)
 
-        return (filename, driver_names)
+        return (filename, driver_names, CAMELOT_CONFIDENCE if driver_names else 0.0)
 
     except Exception:
-        return (filename, [])
+        return (filename, [], 0.0)
 
-def extract_driver_names_with_pdfplumber(pdf_path):
+def extract_driver_names_with_pdfplumber(doc):
     """
     Extracts driver names from table-based manifests using pdfplumber.
     Args:
-        pdf_path (str): Path to the PDF file.
+        doc (ManifestDocument): The opened manifest.
     Returns:
-        tuple: (filename, list of driver names).
+        tuple: (filename, list of driver names, confidence).
     """
-    filename = os.path.basename(pdf_path)
+    filename = doc.filename
     try:
         driver_names = []
-        with pdfplumber.open(pdf_path) as pdf:
-            for page in pdf.pages[:2]:
-                tables = page.extract_tables()
-
-                for table in tables:
-                    for row in table:
-                        if row and any(cell and "Name of Person Transporting" in str(cell) for cell in row):
-                            idx = next(i for i, cell in enumerate(row) if cell and "Name of Person Transporting" in str(cell))
-                            if idx + 1 < len(row) and row[idx + 1]:
-                                name = str(row[idx + 1]).strip()
-                                name = re.sub(r"Employee ID of Driver|CCE\d+", "", name).strip()
-                                driver_names.append(name)
-
-        return (filename, driver_names)
+        for page_number in range(min(2, doc.page_count)):
+            for table in doc.tables(page_number):
+                for row in table:
+                    if row and any(cell and "Name of Person Transporting" in str(cell) for cell in row):
+                        idx = next(i for i, cell in enumerate(row) if cell and "Name of Person Transporting" in str(cell))
+                        if idx + 1 < len(row) and row[idx + 1]:
+                            name = str(row[idx + 1]).strip()
+                            name = re.sub(r"Employee ID of Driver|CCE\d+", "", name).strip()
+                            driver_names.append(name)
+
+        return (filename, driver_names, PDFPLUMBER_CONFIDENCE if driver_names else 0.0)
 
     except Exception:
-        return (filename, [])
+        return (filename, [], 0.0)
 
-def extract_driver_names_with_ocr(pdf_path, page_number=0):
+def extract_driver_names_with_ocr(doc, page_number=0, region=None):
     """
-    Extracts driver names using OCR (Tesseract).
+    Extracts driver names using OCR (Tesseract) of the cell to the right of
+    'Name of Person Transporting'.
     Args:
-        pdf_path (str): Path to the PDF file.
+        doc (ManifestDocument): The opened manifest.
         page_number (int): Page number to process (0-based).
+        region (tuple): Value cell to read directly, e.g. from the layout cache.
     Returns:
-        tuple: (filename, list of driver names).
+        tuple: (filename, list of driver names, confidence, region) where confidence is
+        Tesseract's mean word confidence scaled to 0-1 and region is the cell that was read.
     """
-    filename = os.path.basename(pdf_path)
+    filename = doc.filename
     try:
-        doc = fitz.open(pdf_path)
-        if page_number >= len(doc):
-            return (filename, [])
-
-        page = doc[page_number]
-
-        try:
-            pix = page.render_pixmap(dpi=600)
-        except AttributeError:
-            try:
-                pix = page.get_pixmap(dpi=600)
-            except TypeError:
-                matrix = fitz.Matrix(4, 4)
-                pix = page.get_pixmap(matrix=matrix)
-
-        image_path = "temp_page.png"
-        pix.save(image_path)
-
-        image = Image.open(image_path)
-        image = image.convert("L")
-        image = image.filter(ImageFilter.SHARPEN)
-        enhancer = ImageEnhance.Contrast(image)
-        image = enhancer.enhance(1.0)
-
-        custom_config = r'--oem 3 --psm 6'
-        ocr_data = pytesseract.image_to_data(image, config=custom_config, output_type=Output.DICT)
-        os.remove(image_path)
-
-        all_names = []
-
-        for i in range(len(ocr_data["text"])):
-            if ocr_data["text"][i].strip() == "Name of Person Transporting":
-                word_top = ocr_data["top"][i]
-                word_left_end = ocr_data["left"][i] + ocr_data["width"][i]
-                for j in range(i + 1, len(ocr_data["text"])):
-                    if ocr_data["left"][j] > word_left_end and abs(ocr_data["top"][j] - word_top) < 30:
-                        all_names.append(ocr_data["text"][j].strip())
-
-        return (filename, all_names)
+        if page_number >= doc.page_count:
+            return (filename, [], 0.0, None)
+
+        name, confidence, region = read_value(doc, page_number, "Name of Person Transporting",
+                                              stop_label="Employee ID of Driver", region=region)
+        if not name:
+            return (filename, [], 0.0, region)
+
+        name = re.sub(r"Employee ID of Driver|CCE\d+", "", name).strip()
+        if not name:
+            return (filename, [], 0.0, region)
+
+        return (filename, [name], confidence, region)
 
     except Exception:
-        return (filename, [])
\ No newline at end of file
+        return (filename, [], 0.0, None)
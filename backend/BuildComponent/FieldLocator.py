@@ -0,0 +1,215 @@
+from . import OcrPool
+
+# Resolution of the whole-page OCR pass used only to find labels on pages without a text layer
+LOCATOR_DPI = 150
+# Resolution of the value crops that are actually read
+ROI_DPI = 400
+# Vertical tolerance (points) for words to count as the same line
+LINE_TOLERANCE = 3
+# How far right of a label (points) a value cell may extend when no stop label is found
+MAX_VALUE_WIDTH = 320
+# Padding (points) added around value crops
+ROI_PADDING = 2
+# Confidence given to a value read from a digital page's text layer instead of OCR
+TEXT_LAYER_CONFIDENCE = 0.95
+
+
+def ocr_words(image, dpi, config='--psm 11'):
+    """
+    OCR an image and return its words as boxes in PDF points.
+    Args:
+        image (PIL.Image.Image): Page or region raster.
+        dpi (int): Resolution the image was rendered at.
+        config (str): Tesseract configuration.
+    Returns:
+        list: Word dicts with text, x0, x1, top, bottom and conf keys.
+    """
+    ocr_data = OcrPool.image_to_data(image, config=config)
+    scale = 72 / dpi
+    words = []
+    for i in range(len(ocr_data["text"])):
+        text = ocr_data["text"][i].strip()
+        if not text:
+            continue
+        words.append({
+            "text": text,
+            "x0": ocr_data["left"][i] * scale,
+            "x1": (ocr_data["left"][i] + ocr_data["width"][i]) * scale,
+            "top": ocr_data["top"][i] * scale,
+            "bottom": (ocr_data["top"][i] + ocr_data["height"][i]) * scale,
+            "conf": float(ocr_data["conf"][i]),
+        })
+    return words
+
+
+def find_labels(words, label, tolerance=LINE_TOLERANCE):
+    """
+    Find every occurrence of a multi-word label in a list of word boxes.
+    Args:
+        words (list): Word dicts with text, x0, x1, top and bottom keys, in reading order.
+        label (str): Label text, e.g. "Originating Entity".
+        tolerance (float): Vertical tolerance (points) for the label's words to share a line.
+    Returns:
+        list: Bounding boxes (x0, x1, top, bottom) of the label, in reading order.
+    """
+    tokens = label.lower().split()
+    boxes = []
+    for i in range(len(words) - len(tokens) + 1):
+        candidate = words[i:i + len(tokens)]
+        if [word["text"].lower() for word in candidate] != tokens:
+            continue
+        if any(abs(word["top"] - candidate[0]["top"]) > tolerance for word in candidate):
+            continue
+        boxes.append({
+            "x0": min(word["x0"] for word in candidate),
+            "x1": max(word["x1"] for word in candidate),
+            "top": min(word["top"] for word in candidate),
+            "bottom": max(word["bottom"] for word in candidate),
+        })
+    return boxes
+
+
+def find_label(words, label):
+    """
+    Find a multi-word label in a list of word boxes.
+    Args:
+        words (list): Word dicts with text, x0, x1, top and bottom keys, in reading order.
+        label (str): Label text, e.g. "Originating Entity".
+    Returns:
+        dict: Bounding box (x0, x1, top, bottom) of the first occurrence, or None.
+    """
+    boxes = find_labels(words, label)
+    return boxes[0] if boxes else None
+
+
+def values_right_of(words, label, stop_label=None, tolerance=LINE_TOLERANCE, max_width=MAX_VALUE_WIDTH):
+    """
+    Values to the right of every occurrence of a label on the same line. The
+    words may come from a PDF text layer or from OCR, so digital and scanned
+    pages share one implementation.
+    Args:
+        words (list): Word dicts with text, x0, x1, top and bottom keys (and conf for OCR words), in reading order.
+        label (str): Label to the left of the value, e.g. "Originating Entity".
+        stop_label (str): Label of the next cell on the line, which ends the value.
+        tolerance (float): Vertical tolerance (points) for words to share the label's line.
+        max_width (float): How far right of the label the value may extend when there is no stop label.
+    Returns:
+        list: One dict per occurrence, in reading order, with "text" (words joined left to
+        right), "words" and "region" ((x0, top, x1, bottom) in points, for reading the cell again).
+    """
+    values = []
+    for label_box in find_labels(words, label, tolerance):
+        same_line = sorted((word for word in words if abs(word["top"] - label_box["top"]) <= tolerance
+                            and word["x0"] > label_box["x1"]), key=lambda word: word["x0"])
+        x1 = label_box["x1"] + max_width
+        if stop_label:
+            stop_box = find_label(same_line, stop_label)
+            if stop_box is not None:
+                x1 = stop_box["x0"]
+        value_words = [word for word in same_line if (word["x0"] + word["x1"]) / 2 < x1]
+        values.append({
+            "text": " ".join(word["text"] for word in value_words),
+            "words": value_words,
+            "region": (label_box["x1"] + 1, label_box["top"] - ROI_PADDING, x1 - 1, label_box["bottom"] + ROI_PADDING),
+        })
+    return values
+
+
+def value_right_of(words, label, stop_label=None, tolerance=LINE_TOLERANCE, max_width=MAX_VALUE_WIDTH):
+    """
+    Value to the right of the first occurrence of a label; see values_right_of().
+    Returns:
+        dict: "text", "words" and "region" of the value, or None when the label is not found.
+    """
+    values = values_right_of(words, label, stop_label, tolerance, max_width)
+    return values[0] if values else None
+
+
+def locate_label(doc, page_number, label):
+    """
+    Find a label on a page from the text layer, or from a low-resolution OCR
+    pass when triage found the page to be scanned.
+    Args:
+        doc (ManifestDocument): The opened manifest.
+        page_number (int): Page number (0-based).
+        label (str): Label text.
+    Returns:
+        tuple: (words the label was found in, label box), or (words, None).
+    """
+    words = doc.words(page_number)
+    box = find_label(words, label)
+    if box is None and doc.triage(page_number).kind != "digital":
+        words = ocr_words(doc.raster(page_number, dpi=LOCATOR_DPI, colorspace="L"), LOCATOR_DPI)
+        box = find_label(words, label)
+    return (words, box)
+
+
+def locate_value(doc, page_number, label, stop_label=None):
+    """
+    Find the region holding the value to the right of a label.
+    Args:
+        doc (ManifestDocument): The opened manifest.
+        page_number (int): Page number (0-based).
+        label (str): Label to the left of the value.
+        stop_label (str): Label of the next cell on the same line, if any.
+    Returns:
+        tuple: (x0, top, x1, bottom) in PDF points, or None when the label is not on the page.
+    """
+    words, label_box = locate_label(doc, page_number, label)
+    if label_box is None:
+        return None
+
+    x0, top, x1, bottom = value_right_of(words, label, stop_label)["region"]
+    page_width = doc.fitz.load_page(page_number).rect.width
+    return (x0, top, min(x1, page_width - 1), bottom)
+
+
+def read_region(doc, page_number, region):
+    """
+    Read one value cell: from the text layer on digital pages, which are never
+    rasterized, otherwise by OCR at high resolution with Tesseract's
+    single-line page segmentation mode.
+    Args:
+        doc (ManifestDocument): The opened manifest.
+        page_number (int): Page number (0-based).
+        region (tuple): (x0, top, x1, bottom) in PDF points.
+    Returns:
+        tuple: (text, confidence 0-1).
+    """
+    if doc.triage(page_number).kind == "digital":
+        x0, top, x1, bottom = region
+        inside = [word for word in doc.words(page_number)
+                  if x0 <= (word["x0"] + word["x1"]) / 2 <= x1 and top <= (word["top"] + word["bottom"]) / 2 <= bottom]
+        text = " ".join(word["text"] for word in inside)
+        return (text, TEXT_LAYER_CONFIDENCE if text else 0.0)
+
+    crop = doc.raster_region(page_number, region, dpi=ROI_DPI, colorspace="L")
+    value_words = ocr_words(crop, ROI_DPI, config='--psm 7')
+
+    confidences = [word["conf"] for word in value_words if word["conf"] >= 0]
+    text = " ".join(word["text"] for word in value_words)
+    confidence = sum(confidences) / len(confidences) / 100 if confidences else 0.0
+    return (text, confidence)
+
+
+def read_value(doc, page_number, label, stop_label=None, region=None):
+    """
+    Read only the value cell to the right of a label.
+    Args:
+        doc (ManifestDocument): The opened manifest.
+        page_number (int): Page number (0-based).
+        label (str): Label to the left of the value.
+        stop_label (str): Label of the next cell on the same line, if any.
+        region (tuple): Region already known to hold the value (e.g. from the
+            layout cache); skips locating the label.
+    Returns:
+        tuple: (text, confidence 0-1, region read), or (None, 0.0, None) when the
+        label is not on the page.
+    """
+    if region is None:
+        region = locate_value(doc, page_number, label, stop_label)
+        if region is None:
+            return (None, 0.0, None)
+
+    text, confidence = read_region(doc, page_number, region)
+    return (text, confidence, region)
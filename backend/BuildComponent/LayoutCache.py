@@ -0,0 +1,180 @@
+import os
+import json
+import time
+import hashlib
+import logging
+import sqlite3
+import threading
+from contextlib import contextmanager
+
+# SQLite file remembering which strategy reads each field for a given manifest layout
+LAYOUT_CACHE_DB = os.environ.get("MORGO_LAYOUT_CACHE_DB", "layout_cache.db")
+# Most (layout, field) entries kept; the least recently used are evicted. 0 disables the cache.
+LAYOUT_CACHE_MAX_ENTRIES = int(os.environ.get("MORGO_LAYOUT_CACHE_MAX_ENTRIES", 1000))
+# Labels whose positions on page 1 identify the form layout
+FINGERPRINT_LABELS = ("Originating Entity", "For Agency Use Only", "Name of Person Transporting", "Employee ID of Driver")
+# Positions and page sizes are rounded to this many points, so re-exports of the same form still match
+FINGERPRINT_GRID = 4
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS layouts (
+    fingerprint TEXT NOT NULL,
+    field TEXT NOT NULL,
+    tier TEXT NOT NULL,
+    regions TEXT NOT NULL,
+    confidence REAL NOT NULL,
+    hits INTEGER NOT NULL DEFAULT 0,
+    last_used REAL NOT NULL,
+    PRIMARY KEY (fingerprint, field)
+)
+"""
+
+
+def _snap(value):
+    return int(round(value / FINGERPRINT_GRID))
+
+
+def fingerprint(doc):
+    """
+    Identify a manifest's layout from its first page: page size, producer
+    metadata and where the header labels sit in the text layer. Manifests
+    printed by the same shipper's system share a fingerprint.
+
+    Scanned (image-only) pages have no label positions, so every scan of the
+    same page size and producer would share one fingerprint and one shipper's
+    OCR regions would be applied to all of them; those pages get no fingerprint
+    and always run the full cascade.
+    Args:
+        doc (ManifestDocument): The opened manifest.
+    Returns:
+        str: Hex digest of the layout, or None when the first page cannot be
+        read or has no header labels in its text layer.
+    """
+    try:
+        page = doc.fitz.load_page(0)
+        if not page.get_text("text").strip():
+            return None
+        metadata = doc.fitz.metadata or {}
+        labels = {}
+        for label in FINGERPRINT_LABELS:
+            labels[label] = [[_snap(rect.x0), _snap(rect.y0)] for rect in page.search_for(label)]
+        if not any(labels.values()):
+            return None
+        layout = {
+            "size": [_snap(page.rect.width), _snap(page.rect.height)],
+            "producer": metadata.get("producer") or "",
+            "creator": metadata.get("creator") or "",
+            "labels": labels,
+        }
+    except Exception as e:
+        logging.warning(f"Could not fingerprint {doc.filename}: {str(e)}")
+        return None
+    return hashlib.sha256(json.dumps(layout, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+class LayoutCache:
+    """
+    Persistent, bounded record of the strategy (and crop regions) that last read
+    a field with high confidence for each layout fingerprint. An entry is
+    dropped as soon as it stops producing a confident result, and the least
+    recently used entries are evicted past max_entries.
+    """
+
+    def __init__(self, path=LAYOUT_CACHE_DB, max_entries=LAYOUT_CACHE_MAX_ENTRIES):
+        self.path = path
+        self.max_entries = max_entries
+        self._ready = False
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self):
+        return self.max_entries > 0
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=30)
+        conn.row_factory = sqlite3.Row
+        try:
+            with conn:
+                if not self._ready:
+                    # Created on first use, so importing the extractors does not touch the disk
+                    with self._lock:
+                        conn.execute(SCHEMA)
+                        self._ready = True
+                yield conn
+        finally:
+            conn.close()
+
+    def lookup(self, layout, field):
+        """
+        Strategy remembered for a field of this layout.
+        Args:
+            layout (str): Fingerprint from fingerprint().
+            field (str): Field name, e.g. "company" or "drivers".
+        Returns:
+            dict: tier, regions ([page, [x0, top, x1, bottom]] pairs) and confidence, or None.
+        """
+        if not self.enabled or layout is None:
+            return None
+        try:
+            with self._connect() as conn:
+                row = conn.execute("SELECT tier, regions, confidence FROM layouts WHERE fingerprint = ? AND field = ?",
+                                   (layout, field)).fetchone()
+        except sqlite3.Error as e:
+            logging.warning(f"Layout cache lookup failed: {str(e)}")
+            return None
+        if row is None:
+            return None
+        return {"tier": row["tier"], "regions": json.loads(row["regions"]), "confidence": row["confidence"]}
+
+    def hit(self, layout, field):
+        """Record that a remembered strategy was confident again."""
+        if layout is None:
+            return
+        self._execute("UPDATE layouts SET hits = hits + 1, last_used = ? WHERE fingerprint = ? AND field = ?",
+                      (time.time(), layout, field))
+
+    def remember(self, layout, field, tier, regions, confidence):
+        """
+        Remember the strategy that read a field confidently, evicting the least
+        recently used entries beyond max_entries.
+        Args:
+            layout (str): Fingerprint from fingerprint().
+            field (str): Field name.
+            tier (str): Cascade tier that produced the value.
+            regions (list): [page, [x0, top, x1, bottom]] pairs the tier read, or [].
+            confidence (float): Confidence of the value.
+        """
+        if not self.enabled or layout is None:
+            return
+        try:
+            with self._connect() as conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO layouts (fingerprint, field, tier, regions, confidence, hits, last_used) "
+                    "VALUES (?, ?, ?, ?, ?, 0, ?)",
+                    (layout, field, tier, json.dumps(regions or []), confidence, time.time())
+                )
+                conn.execute(
+                    "DELETE FROM layouts WHERE rowid NOT IN (SELECT rowid FROM layouts ORDER BY last_used DESC LIMIT ?)",
+                    (self.max_entries,)
+                )
+        except sqlite3.Error as e:
+            logging.warning(f"Layout cache update failed: {str(e)}")
+
+    def forget(self, layout, field):
+        """Drop a remembered strategy that no longer reads the field confidently."""
+        if layout is None:
+            return
+        self._execute("DELETE FROM layouts WHERE fingerprint = ? AND field = ?", (layout, field))
+
+    def _execute(self, sql, params):
+        if not self.enabled:
+            return
+        try:
+            with self._connect() as conn:
+                conn.execute(sql, params)
+        except sqlite3.Error as e:
+            logging.warning(f"Layout cache update failed: {str(e)}")
+
+
+layout_cache = LayoutCache()
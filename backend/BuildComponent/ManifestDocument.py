@@ -0,0 +1,214 @@
+import os
+import hashlib
+import fitz  # PyMuPDF
+import pdfplumber
+from PIL import Image
+from .RasterCache import shared_rasters
+from .PageTriage import classify_page
+
+
+class ManifestDocument:
+    """
+    A manifest PDF opened once and shared by every extractor.
+
+    pdfplumber and PyMuPDF handles are opened on first use, and per-page text,
+    words (with bounding boxes), tables and triage are cached so that each
+    page is parsed at most once per request. Rasters live in the process-wide
+    RasterCache, keyed by the document's content hash.
+    """
+
+    def __init__(self, pdf_path):
+        self.path = pdf_path
+        self.filename = os.path.basename(pdf_path)
+        self._plumber = None
+        self._fitz = None
+        self._digest = None
+        self._text = {}
+        self._words = {}
+        self._tables = {}
+        self._camelot = {}
+        self._triage = {}
+
+    def __getstate__(self):
+        # Only the path crosses process boundaries; workers reopen the file
+        return {'path': self.path}
+
+    def __setstate__(self, state):
+        self.__init__(state['path'])
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def close(self):
+        """Close the underlying PDF handles and drop cached pages."""
+        if self._plumber is not None:
+            self._plumber.close()
+            self._plumber = None
+        if self._fitz is not None:
+            self._fitz.close()
+            self._fitz = None
+        self._text.clear()
+        self._words.clear()
+        self._tables.clear()
+        self._camelot.clear()
+        self._triage.clear()
+
+    @property
+    def plumber(self):
+        if self._plumber is None:
+            self._plumber = pdfplumber.open(self.path)
+        return self._plumber
+
+    @property
+    def fitz(self):
+        if self._fitz is None:
+            self._fitz = fitz.open(self.path)
+        return self._fitz
+
+    @property
+    def digest(self):
+        """SHA-256 of the file's contents."""
+        if self._digest is None:
+            digest = hashlib.sha256()
+            with open(self.path, 'rb') as f:
+                for chunk in iter(lambda: f.read(1024 * 1024), b''):
+                    digest.update(chunk)
+            self._digest = digest.hexdigest()
+        return self._digest
+
+    @property
+    def page_count(self):
+        return len(self.plumber.pages)
+
+    def triage(self, page_number):
+        """
+        How a page should be read: from its text layer, with OCR, or not at all.
+        Args:
+            page_number (int): Page number (0-based).
+        Returns:
+            PageTriage.PageKind: The page's kind and the measurements behind it.
+        """
+        if page_number not in self._triage:
+            self._triage[page_number] = classify_page(self.fitz.load_page(page_number))
+        return self._triage[page_number]
+
+    def text(self, page_number, cache=True):
+        """
+        Text layer of a page.
+        Args:
+            page_number (int): Page number (0-based).
+            cache (bool): Keep the text for later calls. Streaming readers pass
+                False so a long manifest is not held in memory page after page.
+        Returns:
+            str: Extracted text, or an empty string when the page has none.
+        """
+        if page_number in self._text:
+            return self._text[page_number]
+
+        page = self.plumber.pages[page_number]
+        text = page.extract_text() or ""
+        if cache:
+            self._text[page_number] = text
+        elif page_number not in self._words and page_number not in self._tables:
+            # Nothing else needs this page's parsed layout. Newer pdfplumber also
+            # memoizes the text map per page, which flush_cache() leaves behind.
+            page.flush_cache()
+            if hasattr(page.get_textmap, "cache_clear"):
+                page.get_textmap.cache_clear()
+        return text
+
+    def words(self, page_number):
+        """
+        Words on the text layer of a page with their bounding boxes (PDF points).
+        They come from PyMuPDF, which reads them in milliseconds where
+        pdfplumber's layout analysis takes a good fraction of a second per page.
+        Args:
+            page_number (int): Page number (0-based).
+        Returns:
+            list: Word dicts with text, x0, x1, top and bottom keys, line by line in reading order.
+        """
+        if page_number not in self._words:
+            page = self.fitz.load_page(page_number)
+            self._words[page_number] = [
+                {"text": text, "x0": x0, "x1": x1, "top": top, "bottom": bottom}
+                for x0, top, x1, bottom, text, block, line, word in page.get_text("words")
+            ]
+        return self._words[page_number]
+
+    def tables(self, page_number):
+        """
+        Tables found by pdfplumber on a page.
+        Args:
+            page_number (int): Page number (0-based).
+        Returns:
+            list: Tables as lists of rows.
+        """
+        if page_number not in self._tables:
+            self._tables[page_number] = self.plumber.pages[page_number].extract_tables()
+        return self._tables[page_number]
+
+    def camelot_tables(self, pages="1,2", flavor="stream"):
+        """
+        Tables found by Camelot. Camelot parses the file itself, so results are
+        cached per (pages, flavor) to keep it to a single pass.
+        Args:
+            pages (str): Camelot page specification (1-based).
+            flavor (str): Camelot parsing flavor.
+        Returns:
+            list: Camelot tables.
+        """
+        key = (pages, flavor)
+        if key not in self._camelot:
+            import camelot
+            self._camelot[key] = list(camelot.read_pdf(self.path, pages=pages, flavor=flavor))
+        return self._camelot[key]
+
+    def raster(self, page_number, dpi, colorspace="RGB"):
+        """
+        Render a page to an in-memory image, reusing a cached raster of the same
+        page when one exists at this or a higher resolution.
+        Args:
+            page_number (int): Page number (0-based).
+            dpi (int): Render resolution.
+            colorspace (str): "RGB" or "L" (greyscale).
+        Returns:
+            PIL.Image.Image: The rendered page. Callers must not modify it in place.
+        """
+        image = shared_rasters.get(self.digest, page_number, dpi, colorspace)
+        if image is None:
+            page = self.fitz.load_page(page_number)
+            pix = page.get_pixmap(dpi=dpi, colorspace=fitz.csGRAY if colorspace == "L" else fitz.csRGB)
+            image = Image.frombytes(colorspace, (pix.width, pix.height), pix.samples)
+            shared_rasters.put(self.digest, page_number, dpi, colorspace, image)
+        return image
+
+    def raster_region(self, page_number, region, dpi, colorspace="RGB"):
+        """
+        Render one region of a page. The region is cropped from a cached raster
+        when one exists at a high enough resolution; otherwise only the region is
+        rendered from the PDF. Region rasters are small and are not cached.
+        Args:
+            page_number (int): Page number (0-based).
+            region (tuple): (x0, top, x1, bottom) in PDF points.
+            dpi (int): Render resolution.
+            colorspace (str): "RGB" or "L" (greyscale).
+        Returns:
+            PIL.Image.Image: The rendered region.
+        """
+        x0, top, x1, bottom = region
+        found = shared_rasters.find(self.digest, page_number, dpi, colorspace)
+        if found is not None:
+            source_dpi, source = found
+            scale = source_dpi / 72
+            crop = source.crop((round(x0 * scale), round(top * scale), round(x1 * scale), round(bottom * scale)))
+            if source_dpi != dpi:
+                crop = crop.resize((max(1, round(crop.width * dpi / source_dpi)), max(1, round(crop.height * dpi / source_dpi))), Image.BOX)
+            return crop
+
+        page = self.fitz.load_page(page_number)
+        pix = page.get_pixmap(dpi=dpi, clip=fitz.Rect(x0, top, x1, bottom),
+                              colorspace=fitz.csGRAY if colorspace == "L" else fitz.csRGB)
+        return Image.frombytes(colorspace, (pix.width, pix.height), pix.samples)
@@ -0,0 +1,134 @@
+import re
+from collections import namedtuple
+
+# Valid weights for Category = Flower
+VALID_WEIGHTS = {"2.83", "5.66", "14.13", "8.49", "11.32", "14.15"}
+
+PACKAGE_ID = re.compile(r"1A[A-Za-z0-9]{19,30}")
+M_NUMBER = re.compile(r"M\d{11}")
+
+ITEM_DETAILS_LABEL = "item details"
+ITEM_DETAILS = re.compile(r"Item Details\s*", re.IGNORECASE)
+# Item Details run until the Source lines or the next package
+ITEM_DETAILS_END = re.compile(r"\nSource\s*(?:Harvest|Package)|\n\d+\.\s*Package\s*[|]?\s*Shipped", re.IGNORECASE)
+LEADING_SPACE = re.compile(r"\s*")
+
+# Name is the first field's value when the details open with Brand: or Strain:
+NAME = re.compile(r"(?:Brand|Strain):\s*([^|]+)")
+# Supply:, Wgt: and Qty: are searched for anywhere in the details, so they are also
+# found inside longer keys ("Days Supply:", "Net Wgt:") and inside other values
+SUPPLY_DAYS = re.compile(r"Supply:\s*(\d+)\s*day\(s\)", re.IGNORECASE)
+WEIGHT = re.compile(r"Wgt:\s*([^|]+)", re.IGNORECASE)
+QUANTITY = re.compile(r"Qty:\s*([^|]+)", re.IGNORECASE)
+NUMERIC_WEIGHT = re.compile(r"(\d+\.\d+)")
+
+STRAINS = (("indica", "Indica"), ("sativa", "Sativa"), ("hybrid", "Hybrid"))
+CATEGORIES = (
+    (("oil for oral",), "Tincture"),
+    (("balm", "lotion", "cream", "topical", "gel"), "Topical"),
+    (("edb oral",), "Edible"),
+    (("vap ",), "Vape"),
+)
+
+ItemDetails = namedtuple("ItemDetails", ["name", "strain", "days", "weight", "category", "fields"])
+
+
+def tokenize(details):
+    """
+    Split pipe-delimited Item Details into fields.
+    Args:
+        details (str): Item Details text, e.g. "Strain: X | THC: 35% | Wgt: 2.83 g".
+    Yields:
+        tuple: (key, value) for each "Key: value" field in order, both stripped.
+        Parts without a colon yield (None, part).
+    """
+    for part in details.split("|"):
+        key, separator, value = part.partition(":")
+        if separator:
+            yield (key.strip(), value.strip())
+        else:
+            yield (None, part.strip())
+
+
+def split_fields(details):
+    """
+    Map the fields of an Item Details string by lower-cased key.
+    Args:
+        details (str): Item Details text.
+    Returns:
+        dict: Field values by key; the first occurrence of a key wins.
+    """
+    fields = {}
+    for key, value in tokenize(details):
+        if key:
+            fields.setdefault(key.lower(), value)
+    return fields
+
+
+def find_item_details(block):
+    """
+    Find the Item Details text of a package block.
+    Args:
+        block (str): Raw text of one package block.
+    Returns:
+        str: The Item Details text, or None when the block has none.
+    """
+    # A case-insensitive regex cannot skip ahead on its literal prefix, so look
+    # the label up in the lower-cased block whenever lowering keeps the offsets
+    block_lower = block.lower()
+    if len(block_lower) == len(block):
+        start = block_lower.find(ITEM_DETAILS_LABEL)
+        if start < 0:
+            return None
+        start = LEADING_SPACE.match(block, start + len(ITEM_DETAILS_LABEL)).end()
+    else:
+        label_match = ITEM_DETAILS.search(block)
+        if not label_match:
+            return None
+        start = label_match.end()
+
+    end_match = ITEM_DETAILS_END.search(block, start)
+    return block[start:end_match.start() if end_match else len(block)].strip()
+
+
+def parse_item_details(details):
+    """
+    Parse Item Details into a typed record with the searches MNumber ran,
+    compiled once.
+    Args:
+        details (str): Item Details text.
+    Returns:
+        ItemDetails: name, strain, days, weight and category (with the same
+        "Not Found"/"Not Specified"/"Unspecified" defaults MNumber reports), plus
+        the fields by lower-cased key.
+    """
+    name_match = NAME.match(details)
+    name = name_match.group(1).strip() if name_match else "Not Found"
+
+    details_lower = details.lower()
+    strain = "Not Specified"
+    for keyword, label in STRAINS:
+        if keyword in details_lower:
+            strain = label
+            break
+
+    days_match = SUPPLY_DAYS.search(details)
+    days = days_match.group(1) if days_match else "Not Specified"
+
+    # Flower is identified by its weight; everything else falls back to Qty:
+    weight_match = WEIGHT.search(details)
+    weight_value = weight_match.group(1).strip() if weight_match else None
+    numeric_weight = NUMERIC_WEIGHT.match(weight_value) if weight_value else None
+    if numeric_weight and numeric_weight.group(1) in VALID_WEIGHTS:
+        weight = weight_value
+        category = "Flower"
+    else:
+        qty_match = QUANTITY.search(details)
+        weight = qty_match.group(1).strip() if qty_match else "Not Specified"
+        category = "Unspecified"
+        for keywords, label in CATEGORIES:
+            if any(keyword in details_lower for keyword in keywords):
+                category = label
+                break
+
+    return ItemDetails(name, strain, days, weight, category, split_fields(details))
@@ -0,0 +1,261 @@
+import os
+import re
+import time
+import queue
+import logging
+import threading
+import multiprocessing
+from PIL import Image
+
+# Number of OCR worker processes; 0 runs OCR in the calling process with pytesseract
+OCR_WORKERS = int(os.environ.get("MORGO_OCR_WORKERS", 2))
+# Jobs a worker serves before it is replaced, to bound leaks in the OCR engine
+OCR_MAX_JOBS = int(os.environ.get("MORGO_OCR_MAX_JOBS", 500))
+# Seconds to wait for a single OCR job before the worker is considered hung
+OCR_TIMEOUT = float(os.environ.get("MORGO_OCR_TIMEOUT", 60))
+# A worker idle for longer than this is pinged before it is handed a job
+OCR_CHECK_IDLE = float(os.environ.get("MORGO_OCR_CHECK_IDLE", 30))
+# Seconds a worker has to answer a ping, including loading the OCR engine when it starts
+OCR_PING_TIMEOUT = float(os.environ.get("MORGO_OCR_PING_TIMEOUT", 10))
+
+
+def _parse_psm(config):
+    psm_match = re.search(r"--psm\s+(\d+)", config or "")
+    return int(psm_match.group(1)) if psm_match else 3
+
+
+def _tesserocr_data(api, image, config):
+    from tesserocr import RIL, iterate_level
+
+    api.SetPageSegMode(_parse_psm(config))
+    api.SetImage(image)
+    api.Recognize()
+
+    ocr_data = {"text": [], "left": [], "top": [], "width": [], "height": [], "conf": []}
+    iterator = api.GetIterator()
+    if iterator is None:
+        return ocr_data
+    for word in iterate_level(iterator, RIL.WORD):
+        text = word.GetUTF8Text(RIL.WORD)
+        box = word.BoundingBox(RIL.WORD)
+        if text is None or box is None:
+            continue
+        left, top, right, bottom = box
+        ocr_data["text"].append(text)
+        ocr_data["left"].append(left)
+        ocr_data["top"].append(top)
+        ocr_data["width"].append(right - left)
+        ocr_data["height"].append(bottom - top)
+        ocr_data["conf"].append(word.Confidence(RIL.WORD))
+    return ocr_data
+
+
+def _pytesseract_data(image, config, lang):
+    import pytesseract
+    from pytesseract import Output
+    return pytesseract.image_to_data(image, config=config, lang=lang, output_type=Output.DICT)
+
+
+def _worker_main(conn, lang):
+    """Worker loop: load the OCR engine once, then serve jobs until told to stop."""
+    api = None
+    try:
+        from tesserocr import PyTessBaseAPI
+        api = PyTessBaseAPI(lang=lang)
+    except Exception:
+        api = None
+    engine = "tesserocr" if api is not None else "pytesseract"
+
+    try:
+        while True:
+            message = conn.recv()
+            if message[0] == "stop":
+                break
+            if message[0] == "ping":
+                conn.send(("ok", engine))
+                continue
+
+            _, mode, size, pixels, config = message
+            try:
+                image = Image.frombytes(mode, size, pixels)
+                if api is not None:
+                    conn.send(("ok", _tesserocr_data(api, image, config)))
+                else:
+                    conn.send(("ok", _pytesseract_data(image, config, lang)))
+            except Exception as e:
+                conn.send(("error", str(e)))
+    except (EOFError, KeyboardInterrupt):
+        pass
+    finally:
+        if api is not None:
+            api.End()
+
+
+class _Worker:
+    def __init__(self, lang):
+        self.conn, child_conn = multiprocessing.Pipe()
+        self.process = multiprocessing.Process(target=_worker_main, args=(child_conn, lang), daemon=True)
+        self.process.start()
+        child_conn.close()
+        self.jobs = 0
+        # OCR engine the worker loaded, known once it has answered a ping
+        self.engine = None
+        self.last_used = time.monotonic()
+
+    def request(self, message, timeout):
+        self.conn.send(message)
+        if not self.conn.poll(timeout):
+            raise TimeoutError(f"OCR worker did not answer within {timeout}s")
+        status, payload = self.conn.recv()
+        if status == "error":
+            raise RuntimeError(payload)
+        return payload
+
+    def ping(self, timeout):
+        self.engine = self.request(("ping",), timeout)
+        self.last_used = time.monotonic()
+        return self.engine
+
+    def alive(self):
+        return self.process.is_alive()
+
+    def stop(self):
+        try:
+            if self.process.is_alive():
+                self.conn.send(("stop",))
+                self.process.join(timeout=2)
+        except (OSError, BrokenPipeError):
+            pass
+        if self.process.is_alive():
+            self.process.kill()
+            self.process.join(timeout=2)
+        self.conn.close()
+
+
+class OcrPool:
+    """
+    Fixed-size pool of long-lived OCR worker processes.
+
+    Each worker loads the Tesseract language model once (through tesserocr when
+    it is installed) and receives raw image buffers over a pipe, so a call does
+    not pay for a tesseract launch, a traineddata load and a temp-file round
+    trip. Without tesserocr the workers fall back to pytesseract behind the same
+    interface, and the pool logs a warning the first time a worker reports it.
+    Callers block until a worker is idle; new workers and workers idle for more
+    than OCR_CHECK_IDLE seconds are pinged before they get a job, dead or hung
+    workers are replaced and every worker is recycled after max_jobs jobs.
+    """
+
+    def __init__(self, workers=OCR_WORKERS, max_jobs=OCR_MAX_JOBS, timeout=OCR_TIMEOUT, lang="eng"):
+        self.lang = lang
+        self.max_jobs = max_jobs
+        self.timeout = timeout
+        self._idle = queue.Queue()
+        self._warned = False
+        for _ in range(workers):
+            self._idle.put(_Worker(lang))
+
+    def _replace(self, worker):
+        worker.stop()
+        return _Worker(self.lang)
+
+    def _checked(self, worker, force=False):
+        """
+        Ping a worker that is new or has been idle for a while, replacing it when
+        it is dead or does not answer (the replacement is pinged on its next turn).
+        Returns:
+            tuple: (worker ready for a job, whether the worker was replaced).
+        """
+        replaced = False
+        if not worker.alive():
+            worker, replaced = self._replace(worker), True
+        if force or worker.engine is None or time.monotonic() - worker.last_used > OCR_CHECK_IDLE:
+            try:
+                worker.ping(OCR_PING_TIMEOUT)
+            except Exception as e:
+                logging.error(f"OCR worker did not answer a ping, replacing it: {str(e)}")
+                worker, replaced = self._replace(worker), True
+        if worker.engine == "pytesseract" and not self._warned:
+            self._warned = True
+            logging.warning("OCR workers are running degraded on pytesseract because tesserocr could not be loaded: "
+                            "every OCR call starts a tesseract process and writes temp files. "
+                            "Install tesserocr (requirements.txt) and the Tesseract language data.")
+        return worker, replaced
+
+    def image_to_data(self, image, config=""):
+        """
+        OCR an image on an idle worker.
+        Args:
+            image (PIL.Image.Image): Image to read.
+            config (str): Tesseract configuration, e.g. "--psm 7".
+        Returns:
+            dict: Same layout as pytesseract.image_to_data(..., output_type=Output.DICT).
+        """
+        worker = self._idle.get()
+        try:
+            worker = self._checked(worker)[0]
+            result = worker.request(("ocr", image.mode, image.size, image.tobytes(), config), self.timeout)
+            worker.last_used = time.monotonic()
+            worker.jobs += 1
+            if worker.jobs >= self.max_jobs:
+                worker = self._replace(worker)
+            return result
+        except (TimeoutError, EOFError, OSError) as e:
+            logging.error(f"OCR worker failed, replacing it: {str(e)}")
+            worker = self._replace(worker)
+            raise
+        finally:
+            self._idle.put(worker)
+
+    def health_check(self):
+        """
+        Ping every idle worker and replace the ones that do not answer.
+        Returns:
+            int: Number of workers replaced.
+        """
+        replaced = 0
+        checked = []
+        while True:
+            try:
+                worker = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            worker, was_replaced = self._checked(worker, force=True)
+            replaced += was_replaced
+            checked.append(worker)
+        for worker in checked:
+            self._idle.put(worker)
+        return replaced
+
+    def close(self):
+        while True:
+            try:
+                self._idle.get_nowait().stop()
+            except queue.Empty:
+                break
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = OcrPool()
+        return _pool
+
+
+def image_to_data(image, config=""):
+    """
+    OCR an image through the shared worker pool.
+    Args:
+        image (PIL.Image.Image): Image to read.
+        config (str): Tesseract configuration.
+    Returns:
+        dict: Same layout as pytesseract.image_to_data(..., output_type=Output.DICT).
+    """
+    if OCR_WORKERS <= 0:
+        return _pytesseract_data(image, config, "eng")
+    return get_pool().image_to_data(image, config)
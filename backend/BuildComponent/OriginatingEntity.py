@@ -1,78 +1,66 @@
-import fitz  # PyMuPDF
-from PIL import Image
-import pytesseract
-from pytesseract import Output
-import os
+from .FieldLocator import read_value, value_right_of
 
+# Confidence given to a company name read straight from the PDF text layer
+TEXT_LAYER_CONFIDENCE = 0.95
 
-def process_pdf(pdf_path):
+
+def clean_company_name(text):
     """
-    Extract the company name to the right of 'Originating Entity' using OCR.
+    Strip the legal suffix and neighbouring form labels from a company name.
     Args:
-        pdf_path (str): Path to the PDF file.
+        text (str): Raw text found to the right of 'Originating Entity'.
     Returns:
-        tuple: (filename, result) where result is the company name or an error message.
+        str: The cleaned company name (may be empty).
     """
-    filename = os.path.basename(pdf_path)
-
-    if not os.path.exists(pdf_path):
-        return (filename, f"PDF file not found: {pdf_path}")
-
-    # Convert first PDF page to high-res image
-    doc = fitz.open(pdf_path)
-    page = doc.load_page(0)
-    zoom = 2  # Reduced zoom for better text grouping
-    mat = fitz.Matrix(zoom, zoom)
-    pix = page.get_pixmap(matrix=mat)
-    img_path = "high_res_page.png"
-    pix.save(img_path)
-    doc.close()
+    return text \
+        .replace('LLC', '') \
+        .replace('For Agency Use Only', '') \
+        .replace(', ', '') \
+        .replace('[', '') \
+        .replace(']', '') \
+        .strip()
 
-    # OCR with optimized configuration
-    ocr_data = pytesseract.image_to_data(
-        Image.open(img_path),
-        output_type=Output.DICT,
-        config='--psm 4',  # Assume column-based text
-        lang='eng'
-    )
 
-    # Find "Originating" and "Entity" positions
-    originating_idx = -1
-    entity_idx = -1
-    for i in range(len(ocr_data["text"])):
-        text = ocr_data["text"][i].strip().lower()
-        if "originating" in text:
-            originating_idx = i
-        elif "entity" in text and originating_idx != -1 and (i - originating_idx) <= 2:
-            entity_idx = i
-            break
+def extract_entity_from_text(doc):
+    """
+    Extract the company name to the right of 'Originating Entity' from the word
+    boxes of the PDF text layer, without rendering the page.
+    Args:
+        doc (ManifestDocument): The opened manifest.
+    Returns:
+        tuple: (filename, result, confidence) where result is the company name or an error message.
+    """
+    filename = doc.filename
+    value = value_right_of(doc.words(0), "Originating Entity", stop_label="For Agency Use Only")
+    if value is None:
+        return (filename, "Could not locate 'Originating Entity'", 0.0)
 
-    if originating_idx == -1 or entity_idx == -1:
-        return (filename, "Could not locate 'Originating Entity'")
+    cleaned = clean_company_name(value["text"])
+    if not cleaned:
+        return (filename, "No company name found", 0.0)
+    return (filename, cleaned, TEXT_LAYER_CONFIDENCE)
 
-    # Calculate combined bounding box
-    orig_left = ocr_data["left"][originating_idx]
-    orig_top = ocr_data["top"][originating_idx]
-    entity_right = ocr_data["left"][entity_idx] + ocr_data["width"][entity_idx]
 
-    # Find text to the right of "Entity"
-    company_text = []
-    y_tolerance = 15  # Vertical position tolerance
+def process_pdf(doc, region=None):
+    """
+    Extract the company name to the right of 'Originating Entity' using OCR.
+    Only the value cell next to the label is read, at high resolution.
+    Args:
+        doc (ManifestDocument): The opened manifest.
+        region (tuple): Value cell on page 1 to read directly, e.g. from the layout cache.
+    Returns:
+        tuple: (filename, result, confidence, region) where result is the company name or an error message,
+        confidence is Tesseract's mean word confidence scaled to 0-1 and region is the cell that was read.
+    """
+    filename = doc.filename
 
-    for i in range(len(ocr_data["text"])):
-        if ocr_data["left"][i] > entity_right and \
-                abs(ocr_data["top"][i] - orig_top) < y_tolerance:
-            company_text.append(ocr_data["text"][i])
+    company_text, confidence, region = read_value(doc, 0, "Originating Entity", stop_label="For Agency Use Only", region=region)
+    if company_text is None:
+        return (filename, "Could not locate 'Originating Entity'", 0.0, None)
 
     # Clean the result
-    if company_text:
-        cleaned = ' '.join(company_text) \
-            .replace('LLC', '') \
-            .replace('For Agency Use Only', '') \
-            .replace(', ', '') \
-            .replace('[', '') \
-            .replace(']', '') \
-            .strip()
-        return (filename, cleaned if cleaned else "No company name found")
+    cleaned = clean_company_name(company_text)
+    if cleaned:
+        return (filename, cleaned, confidence, region)
 
-    return (filename, "No company name found")
\ No newline at end of file
+    return (filename, "No company name found", 0.0, region)
@@ -1,9 +1,15 @@
 import warnings
 import logging
-from .OriginatingEntity import process_pdf
-from .Drivers import extract_driver_names_with_camelot, extract_driver_names_with_pdfplumber, extract_driver_names_with_ocr
-from .MNumber import extract_m_numbers
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from .OriginatingEntity import process_pdf, extract_entity_from_text
+from .Drivers import extract_driver_names_from_text, extract_driver_names_with_camelot, extract_driver_names_with_pdfplumber, extract_driver_names_with_ocr
+from .Cascade import run_cascade, CONFIDENCE_THRESHOLD
+from .LayoutCache import fingerprint, layout_cache
+from .MNumber import iter_m_numbers, configure_logging
+from .ManifestDocument import ManifestDocument
 import os
+import threading
 
 # Suppress CropBox warnings from pdfplumber
 class CropBoxWarningFilter(logging.Filter):
@@ -12,64 +18,342 @@ class CropBoxWarningFilter(logging.Filter):
 
 logging.getLogger().addFilter(CropBoxWarningFilter())
 
+# Bump when the shape or content of extract_data's result changes, so cached
+# scans from an older version are not served.
+PROCESSOR_VERSION = 3
+
 # Suppress other warnings (e.g., CryptographyDeprecationWarning)
 warnings.filterwarnings("ignore")
 
-def extract_data(pdf_file):
+# Camelot runs on a bounded process pool alongside the OCR strategies, which are
+# served by the OcrPool workers. Set MORGO_DRIVER_WORKERS=1 to run Camelot in the
+# request process instead.
+DRIVER_WORKERS = int(os.environ.get("MORGO_DRIVER_WORKERS", min(4, os.cpu_count() or 1)))
+
+_driver_pool = None
+_driver_pool_lock = threading.Lock()
+
+def _get_driver_pool():
+    global _driver_pool
+    with _driver_pool_lock:
+        if _driver_pool is None:
+            _driver_pool = ProcessPoolExecutor(max_workers=DRIVER_WORKERS)
+        return _driver_pool
+
+def _run_driver_strategy(strategy, pdf_path, *args):
+    # Runs inside a pool worker, which opens its own copy of the manifest
+    with ManifestDocument(pdf_path) as doc:
+        return strategy(doc, *args)
+
+def _run_in_pool(doc, strategies):
     """
-    Extract data from the PDF using OriginatingEntity, Drivers, and MNumber scripts.
+    Run strategies side by side in the process pool, falling back to running
+    them one after another in this process.
     Args:
-        pdf_file (str): Path to the PDF file.
+        doc (ManifestDocument): The opened manifest.
+        strategies (list): (function, args) pairs.
     Returns:
-        dict: Extracted data structured for BuildingScan.js.
+        list: Each strategy's result, in the order given.
     """
-    result = {
-        "company": "",
-        "drivers": "",
-        "items": []
+    global _driver_pool
+    if DRIVER_WORKERS > 1:
+        try:
+            pool = _get_driver_pool()
+            futures = [pool.submit(_run_driver_strategy, strategy, doc.path, *args) for strategy, args in strategies]
+            return [future.result() for future in futures]
+        except BrokenProcessPool as e:
+            logging.error(f"Driver strategy pool failed, running strategies serially: {str(e)}")
+            with _driver_pool_lock:
+                _driver_pool = None
+
+    return [strategy(doc, *args) for strategy, args in strategies]
+
+def _run_layout_cascade(field, tiers, threshold, layout, region_tiers, regions):
+    """
+    Run a field's cascade, starting with the strategy the layout cache remembers
+    for this layout. The cache entry is dropped when that strategy is no longer
+    confident, and replaced by whichever tier now is.
+    Args:
+        field (str): Field name, e.g. "company".
+        tiers (list): (tier name, callable) pairs, cheapest first, as run_cascade() takes them.
+        threshold (float): Confidence needed to stop.
+        layout (str): Layout fingerprint, or None to skip the cache.
+        region_tiers (dict): Tier name -> callable(regions, attempts) that reads remembered
+            regions directly instead of locating the labels first.
+        regions (dict): Tier name -> regions read, filled in by the tiers as they run.
+    Returns:
+        tuple: (value, confidence, tier, served) where served is True when the
+        remembered strategy produced the value.
+    """
+    if threshold is None:
+        threshold = CONFIDENCE_THRESHOLD
+
+    cached = layout_cache.lookup(layout, field)
+    preferred = {}
+    if cached is not None:
+        tier = cached["tier"]
+        # Reading the remembered regions directly keeps the full tier as a fallback;
+        # otherwise the remembered tier is simply moved to the front
+        direct = bool(cached["regions"]) and tier in region_tiers
+        if direct:
+            extract = lambda attempts: region_tiers[tier](cached["regions"], attempts)
+        else:
+            extract = dict(tiers).get(tier)
+        if extract is not None:
+            def preferred_tier(attempts):
+                value, confidence = extract(attempts)
+                preferred["confidence"] = confidence
+                return (value, confidence)
+            tiers = [(tier, preferred_tier)] + [(name, run) for name, run in tiers if direct or name != tier]
+
+    value, confidence, tier = run_cascade(field, tiers, threshold)
+
+    if preferred.get("confidence", 0.0) >= threshold:
+        layout_cache.hit(layout, field)
+        return (value, confidence, tier, True)
+    if cached is not None:
+        layout_cache.forget(layout, field)
+    if confidence >= threshold:
+        layout_cache.remember(layout, field, tier, regions.get(tier, []), confidence)
+    return (value, confidence, tier, False)
+
+def extract_company(doc, threshold=None, layout=None):
+    """
+    Extract the originating entity, reading the text layer first and only
+    falling back to OCR when the text layer is not confident enough. Manifests
+    whose layout is in the layout cache go straight to the strategy (and value
+    cell) that read it last time.
+    Args:
+        doc (ManifestDocument): The opened manifest.
+        threshold (float): Confidence needed to skip OCR.
+        layout (str): Layout fingerprint from LayoutCache.fingerprint(), or None.
+    Returns:
+        tuple: (company, confidence, tier, served from the layout cache).
+    """
+    regions = {}
+
+    def text_tier(attempts):
+        filename, company, confidence = extract_entity_from_text(doc)
+        return (company, confidence)
+
+    def ocr_tier(attempts, region=None):
+        filename, company, confidence, region = process_pdf(doc, region)
+        regions["ocr"] = [[0, list(region)]] if region else []
+        return (company, confidence)
+
+    def ocr_region_tier(cached_regions, attempts):
+        page_number, region = cached_regions[0]
+        return ocr_tier(attempts, tuple(region))
+
+    return _run_layout_cascade("company", [("text", text_tier), ("ocr", ocr_tier)], threshold, layout,
+                               {"ocr": ocr_region_tier}, regions)
+
+def extract_driver_names(doc, threshold=None, layout=None):
+    """
+    Extract driver names, trying the text layer and pdfplumber tables before
+    Camelot and OCR. When the cheap tiers are not confident enough, Camelot (in
+    the process pool) and OCR of pages 0 and 1 (in the OCR workers) run
+    concurrently, so the fallback costs as long as the slowest strategy rather
+    than the sum of all of them. For a layout in the layout cache, only the
+    remembered strategy, or just the remembered OCR cells, are read first.
+    Args:
+        doc (ManifestDocument): The opened manifest.
+        threshold (float): Confidence needed to skip the next tier.
+        layout (str): Layout fingerprint from LayoutCache.fingerprint(), or None.
+    Returns:
+        tuple: (unique driver names in strategy order, confidence, tier, served from the layout cache).
+    """
+    regions = {}
+
+    def text_tier(attempts):
+        filename, names, confidence = extract_driver_names_from_text(doc)
+        return (names, confidence)
+
+    def pdfplumber_tier(attempts):
+        filename, names, confidence = extract_driver_names_with_pdfplumber(doc)
+        return (names, confidence)
+
+    def merge(attempts, results):
+        # Keep whatever the cheaper tiers found, as the serial pipeline used to
+        driver_names = []
+        for tier, names, confidence in attempts:
+            driver_names.extend(names)
+        for names, confidence in results:
+            driver_names.extend(names)
+        confidence = max([confidence for names, confidence in results] +
+                         [confidence for tier, names, confidence in attempts])
+        return (list(dict.fromkeys(driver_names)), confidence)
+
+    def fallback_tier(attempts):
+        # OCR already runs in the OcrPool processes, so threads are enough to overlap it with Camelot
+        with ThreadPoolExecutor(max_workers=2) as threads:
+            ocr_futures = {page_number: threads.submit(extract_driver_names_with_ocr, doc, page_number)
+                           for page_number in (0, 1)}
+            results = [(names, confidence) for filename, names, confidence
+                       in _run_in_pool(doc, [(extract_driver_names_with_camelot, ())])]
+            read = []
+            for page_number, future in ocr_futures.items():
+                filename, names, confidence, region = future.result()
+                results.append((names, confidence))
+                if names and region:
+                    read.append([page_number, list(region)])
+        regions["camelot_ocr"] = read
+        return merge(attempts, results)
+
+    def ocr_region_tier(cached_regions, attempts):
+        # Only the cells that held the names last time; Camelot and the label search are skipped
+        results = []
+        for page_number, region in cached_regions:
+            filename, names, confidence, region = extract_driver_names_with_ocr(doc, page_number, tuple(region))
+            results.append((names, confidence))
+        regions["camelot_ocr"] = cached_regions
+        return merge(attempts, results)
+
+    names, confidence, tier, served = _run_layout_cascade("drivers", [
+        ("text", text_tier),
+        ("pdfplumber", pdfplumber_tier),
+        ("camelot_ocr", fallback_tier),
+    ], threshold, layout, {"camelot_ocr": ocr_region_tier}, regions)
+    return (list(dict.fromkeys(names)), confidence, tier, served)
+
+def _source(tier, confidence, served):
+    source = {"tier": tier, "confidence": round(confidence, 2)}
+    if served:
+        source["layout_cache"] = True
+    return source
+
+def format_item(item):
+    """
+    Shape an MNumber record for BuildingScan.js.
+    Args:
+        item (dict): Record yielded by MNumber.iter_m_numbers().
+    Returns:
+        dict: The item as the scan endpoints return it.
+    """
+    return {
+        "item_number": item["M_Number"],
+        "package_id": item["Package_ID"],
+        "m_number": item["M_Number"],
+        "name": item["Name"],
+        "type": item["Category"],
+        "strain": item["Strain"],
+        "days": item["Days"],
+        "weight": item["Weight"],
+        "Item_Details": item["Item_Details"]  # Add Item_Details to the response
     }
 
+def iter_data(pdf_file, confidence_threshold=None):
+    """
+    Extract data from the PDF as a stream of events, so callers can show the
+    header fields and each package as soon as they are known.
+    Args:
+        pdf_file (str): Path to the PDF file.
+        confidence_threshold (float): Confidence needed to skip Camelot/OCR;
+            defaults to Cascade.CONFIDENCE_THRESHOLD.
+    Yields:
+        dict: {"event": "company", "company", "source"}, then
+        {"event": "drivers", "drivers", "source"}, then one {"event": "item", "item"}
+        per package. {"event": "error", "error"} ends the stream early.
+    """
+    configure_logging()
+
     # Check if the PDF exists
     if not os.path.exists(pdf_file):
-        result["error"] = f"PDF file not found: {pdf_file}"
-        return result
+        yield {"event": "error", "error": f"PDF file not found: {pdf_file}"}
+        return
 
     try:
-        # 1. Originating Entity
-        filename, company_result = process_pdf(pdf_file)
-        result["company"] = company_result if company_result != "Could not locate 'Originating Entity'" else "Not Found"
+        with ManifestDocument(pdf_file) as doc:
+            layout = fingerprint(doc) if layout_cache.enabled else None
 
-        # 2. Driver Names
-        driver_names = []
-        filename, camelot_driver_names = extract_driver_names_with_camelot(pdf_file)
-        driver_names.extend(camelot_driver_names)
-        filename, pdfplumber_driver_names = extract_driver_names_with_pdfplumber(pdf_file)
-        driver_names.extend(pdfplumber_driver_names)
-        for page_num in [0, 1]:
-            filename, ocr_driver_names = extract_driver_names_with_ocr(pdf_file, page_number=page_num)
-            driver_names.extend(ocr_driver_names)
-        unique_driver_names = list(dict.fromkeys(driver_names))
-        result["drivers"] = " / ".join(unique_driver_names) if unique_driver_names else "Not Found"
-
-        # 3. M Numbers
-        filename, m_numbers = extract_m_numbers(pdf_file)
-        result["items"] = [
-            {
-                "item_number": item["M_Number"],
-                "package_id": item["Package_ID"],
-                "m_number": item["M_Number"],
-                "name": item["Name"],
-                "type": item["Category"],
-                "strain": item["Strain"],
-                "days": item["Days"],
-                "weight": item["Weight"],
-                "Item_Details": item["Item_Details"]  # Add Item_Details to the response
+            # 1. Originating Entity
+            company_result, confidence, tier, served = extract_company(doc, confidence_threshold, layout)
+            yield {
+                "event": "company",
+                "company": company_result if company_result != "Could not locate 'Originating Entity'" else "Not Found",
+                "source": _source(tier, confidence, served)
+            }
+
+            # 2. Driver Names
+            unique_driver_names, confidence, tier, served = extract_driver_names(doc, confidence_threshold, layout)
+            yield {
+                "event": "drivers",
+                "drivers": " / ".join(unique_driver_names) if unique_driver_names else "Not Found",
+                "source": _source(tier, confidence, served)
             }
-            for item in m_numbers
-        ]
+
+            # 3. M Numbers, one package block at a time; a failure here keeps the items found so far
+            try:
+                for item in iter_m_numbers(doc):
+                    yield {"event": "item", "item": format_item(item)}
+            except Exception as e:
+                logging.error(f"Error processing {doc.path}: {e}")
 
     except Exception as e:
-        result["error"] = f"Error processing PDF: {str(e)}"
         logging.error(f"Error in extract_data: {str(e)}")
+        yield {"event": "error", "error": f"Error processing PDF: {str(e)}"}
+
+def add_event(result, event):
+    """
+    Fold one iter_data() event into an extract_data() result.
+    Args:
+        result (dict): Result being built, with company, drivers, items and sources keys.
+        event (dict): Event yielded by iter_data().
+    """
+    if event["event"] in ("company", "drivers"):
+        result[event["event"]] = event[event["event"]]
+        result["sources"][event["event"]] = event["source"]
+    elif event["event"] == "item":
+        result["items"].append(event["item"])
+    elif event["event"] == "error":
+        result["error"] = event["error"]
+
+def iter_result_events(result):
+    """
+    Replay a finished extract_data() result, e.g. a cached one, as iter_data() events.
+    Args:
+        result (dict): Result returned by extract_data().
+    Yields:
+        dict: The events iter_data() would have produced.
+    """
+    for field in ("company", "drivers"):
+        if field in result["sources"]:
+            yield {"event": field, field: result[field], "source": result["sources"][field]}
+    for item in result["items"]:
+        yield {"event": "item", "item": item}
+    if "error" in result:
+        yield {"event": "error", "error": result["error"]}
+
+def extract_data(pdf_file, confidence_threshold=None, progress=None):
+    """
+    Extract data from the PDF using OriginatingEntity, Drivers, and MNumber scripts.
+    The PDF is opened once and the parsed document is shared by every extractor.
+    Header fields come from the cheapest tier that is confident enough; "sources"
+    records which tier produced each one.
+    Args:
+        pdf_file (str): Path to the PDF file.
+        confidence_threshold (float): Confidence needed to skip Camelot/OCR;
+            defaults to Cascade.CONFIDENCE_THRESHOLD.
+        progress (callable): Optional progress(stage) callback, called as each field starts.
+    Returns:
+        dict: Extracted data structured for BuildingScan.js.
+    """
+    result = {
+        "company": "",
+        "drivers": "",
+        "items": [],
+        "sources": {}
+    }
+
+    if progress is None:
+        progress = lambda stage: None
+
+    progress("company")
+    for event in iter_data(pdf_file, confidence_threshold):
+        add_event(result, event)
+        if event["event"] == "company":
+            progress("drivers")
+        elif event["event"] == "drivers":
+            progress("items")
 
-    return result
\ No newline at end of file
+    return result
@@ -0,0 +1,105 @@
+import os
+import logging
+from collections import namedtuple
+from .FieldLocator import ocr_words, LINE_TOLERANCE
+
+# Non-whitespace characters a page's text layer needs before it is read as a digital page
+MIN_TEXT_CHARS = int(os.environ.get("MORGO_TRIAGE_MIN_TEXT_CHARS", 50))
+# Share of the page images must cover before a page without enough text is OCR'd
+MIN_IMAGE_COVERAGE = float(os.environ.get("MORGO_TRIAGE_MIN_IMAGE_COVERAGE", 0.5))
+# Resolution scanned pages are OCR'd at
+PAGE_OCR_DPI = 300
+
+DIGITAL = "digital"
+SCANNED = "scanned"
+BLANK = "blank"
+
+PageKind = namedtuple("PageKind", ["kind", "text_chars", "image_coverage", "fonts"])
+
+
+def classify_page(page):
+    """
+    Decide how a page should be read from its text layer density, the share of
+    the page covered by images and whether it uses any fonts. Only PyMuPDF's
+    page structure is inspected; nothing is rendered.
+    Args:
+        page (fitz.Page): The page.
+    Returns:
+        PageKind: kind is DIGITAL (read the text layer), SCANNED (OCR it) or
+        BLANK (nothing to read), with the measurements it was based on.
+    """
+    text_chars = len("".join(page.get_text("text").split()))
+    fonts = len(page.get_fonts())
+
+    page_area = page.rect.width * page.rect.height
+    covered = 0.0
+    for image in page.get_image_info():
+        x0, top, x1, bottom = image["bbox"]
+        width = min(x1, page.rect.x1) - max(x0, page.rect.x0)
+        height = min(bottom, page.rect.y1) - max(top, page.rect.y0)
+        if width > 0 and height > 0:
+            covered += width * height
+    image_coverage = min(1.0, covered / page_area) if page_area else 0.0
+
+    if fonts and text_chars >= MIN_TEXT_CHARS:
+        kind = DIGITAL
+    elif image_coverage >= MIN_IMAGE_COVERAGE:
+        kind = SCANNED
+    elif text_chars:
+        # A sparse text layer with no scan behind it is still the best source
+        kind = DIGITAL
+    else:
+        kind = BLANK
+    return PageKind(kind, text_chars, round(image_coverage, 3), fonts)
+
+
+def lines_from_words(words):
+    """
+    Rebuild text lines from word boxes, top to bottom and left to right, in
+    the shape pdfplumber's extract_text() gives for a text layer.
+    Args:
+        words (list): Word dicts with text, x0 and top keys.
+    Returns:
+        str: One line of words per text line.
+    """
+    lines = []
+    for word in sorted(words, key=lambda word: (word["top"], word["x0"])):
+        if lines and abs(word["top"] - lines[-1][0]) <= LINE_TOLERANCE:
+            lines[-1][1].append(word)
+        else:
+            lines.append((word["top"], [word]))
+    return "\n".join(" ".join(word["text"] for word in sorted(line, key=lambda word: word["x0"]))
+                     for top, line in lines)
+
+
+def ocr_text(doc, page_number):
+    """
+    OCR a whole page into text lines.
+    Args:
+        doc (ManifestDocument): The opened manifest.
+        page_number (int): Page number (0-based).
+    Returns:
+        str: The page's text.
+    """
+    image = doc.raster(page_number, dpi=PAGE_OCR_DPI, colorspace="L")
+    return lines_from_words(ocr_words(image, PAGE_OCR_DPI))
+
+
+def page_text(doc, page_number, cache=True):
+    """
+    Text of a page from the cheapest source that has it: the text layer of
+    digital pages, which are never rasterized, or OCR of scanned ones.
+    Args:
+        doc (ManifestDocument): The opened manifest.
+        page_number (int): Page number (0-based).
+        cache (bool): Passed to ManifestDocument.text() for digital pages.
+    Returns:
+        str: The page's text, or an empty string for a blank page.
+    """
+    triage = doc.triage(page_number)
+    if triage.kind == SCANNED:
+        logging.info(f"Page {page_number + 1} of {doc.filename} is scanned; reading it with OCR")
+        return ocr_text(doc, page_number)
+    if triage.kind == BLANK:
+        return ""
+    return doc.text(page_number, cache=cache)
@@ -0,0 +1,115 @@
+import os
+import threading
+from collections import OrderedDict
+from PIL import Image
+
+# Upper bound on the memory held by cached page rasters
+RASTER_CACHE_MAX_BYTES = int(os.environ.get("MORGO_RASTER_CACHE_MAX_BYTES", 256 * 1024 * 1024))
+
+
+def _image_bytes(image):
+    return image.width * image.height * len(image.getbands())
+
+
+class RasterCache:
+    """
+    In-memory LRU cache of rendered pages shared by every OCR consumer.
+
+    Entries are keyed by (document hash, page, dpi, colorspace). A request for
+    a resolution that is not cached is served by downsampling the closest
+    higher-resolution raster of the same page, so a page is rendered from the
+    PDF at most once per colorspace.
+    """
+
+    def __init__(self, max_bytes=RASTER_CACHE_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+
+    def get(self, doc_hash, page_number, dpi, colorspace):
+        """
+        Look up a raster, downsampling a higher-resolution one if needed.
+        Args:
+            doc_hash (str): Digest of the document.
+            page_number (int): Page number (0-based).
+            dpi (int): Wanted resolution.
+            colorspace (str): PIL mode, "RGB" or "L".
+        Returns:
+            PIL.Image.Image: The raster, or None on a miss.
+        """
+        key = (doc_hash, page_number, dpi, colorspace)
+        with self._lock:
+            image = self._entries.get(key)
+            if image is not None:
+                self._entries.move_to_end(key)
+                return image
+
+        found = self.find(doc_hash, page_number, dpi, colorspace)
+        if found is None:
+            return None
+
+        source_dpi, source = found
+        scale = dpi / source_dpi
+        image = source.resize((max(1, round(source.width * scale)), max(1, round(source.height * scale))), Image.BOX)
+        self.put(doc_hash, page_number, dpi, colorspace, image)
+        return image
+
+    def find(self, doc_hash, page_number, min_dpi, colorspace):
+        """
+        Closest cached raster of a page at or above a resolution, without resampling.
+        Args:
+            doc_hash (str): Digest of the document.
+            page_number (int): Page number (0-based).
+            min_dpi (int): Lowest acceptable resolution.
+            colorspace (str): Wanted PIL mode; a grey request can also use an RGB raster.
+        Returns:
+            tuple: (dpi, image) in the wanted colorspace, or None.
+        """
+        with self._lock:
+            candidates = [
+                (entry_key[2], entry_key[3] != colorspace, image)
+                for entry_key, image in self._entries.items()
+                if entry_key[:2] == (doc_hash, page_number) and entry_key[2] >= min_dpi
+                and (entry_key[3] == colorspace or (colorspace == "L" and entry_key[3] == "RGB"))
+            ]
+        if not candidates:
+            return None
+
+        source_dpi, needs_convert, source = min(candidates, key=lambda candidate: candidate[:2])
+        if needs_convert:
+            source = source.convert(colorspace)
+        return (source_dpi, source)
+
+    def put(self, doc_hash, page_number, dpi, colorspace, image):
+        """
+        Store a raster, evicting the least recently used ones past max_bytes.
+        Args:
+            doc_hash (str): Digest of the document.
+            page_number (int): Page number (0-based).
+            dpi (int): Resolution of the raster.
+            colorspace (str): PIL mode of the raster.
+            image (PIL.Image.Image): The raster.
+        """
+        key = (doc_hash, page_number, dpi, colorspace)
+        size = _image_bytes(image)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._size -= _image_bytes(previous)
+            self._entries[key] = image
+            self._size += size
+            while self._size > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._size -= _image_bytes(evicted)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+
+
+# Cache shared by every ManifestDocument in this process
+shared_rasters = RasterCache()
@@ -1,24 +1,30 @@
 from flask import Flask, request, jsonify, send_from_directory
 from werkzeug.utils import secure_filename
 import os
+import time
+import uuid
+import shutil
+import zipfile
 import datetime
+import importlib
+import threading
 from flask_cors import CORS
 
-# Import custom modules
-from metric import process_metric_file
-from dutchie import process_dutchie_file, clear_output_directory
-import MorningRUN
-import WeeklyRUN
-from order import process_order_file
+# Import custom modules. The processors (pandas, PyMuPDF, pdfplumber, openpyxl)
+# are imported by the routes that use them, so the app starts serving quickly.
 from email_sender import send_email
 from buildscan import buildscan_bp  # Importing buildscan blueprint
-from BuildComponent.PDFBuild import extract_data  # Import PDFBuild from BuildComponent
+from result_cache import shared_cache, cache_key, file_digest
+from jobs import jobs_bp, job_queue
+from streaming import event_stream
 
 app = Flask(__name__)
 CORS(app, resources={r"/*": {"origins": ["https://morgotools.com", "http://localhost:3000", "https://www.morgotools.com"]}})
 
 # Register the buildscan blueprint with URL prefix
 app.register_blueprint(buildscan_bp, url_prefix='/api/buildscan')
+# Asynchronous versions of the upload endpoints: POST /api/jobs/<kind>, GET /api/jobs/<job_id>
+app.register_blueprint(jobs_bp, url_prefix='/api/jobs')
 
 # File upload configurations
 UPLOAD_FOLDER = 'Uploads'
@@ -35,6 +41,24 @@ DUTCHIE_COMPLETE_FOLDER = 'DUTCHIE-OUT'
 ORDER_COMPLETE_FOLDER = 'ORDER-OUT'
 
 ALLOWED_EXTENSIONS = {'csv', 'xlsx', 'pdf'}
+# Most manifests accepted in one batch scan, counting the PDFs inside zips
+BATCH_MAX_FILES = int(os.environ.get('MORGO_BATCH_MAX_FILES', 50))
+# Most bytes the PDFs inside the zips of one batch scan may take once extracted
+BATCH_MAX_ZIP_BYTES = int(os.environ.get('MORGO_BATCH_MAX_ZIP_BYTES', 500 * 1024 * 1024))
+# Set MORGO_WARMUP=1 to import the processors in the background once the server is up,
+# so the first request to each route does not pay for its imports
+WARMUP = os.environ.get('MORGO_WARMUP', '0') == '1'
+# Seconds to wait after startup before warming up
+WARMUP_DELAY = float(os.environ.get('MORGO_WARMUP_DELAY', 1))
+# Modules imported lazily by the routes, in the order the warm-up loads them
+PROCESSOR_MODULES = (
+    'BuildComponent.PDFBuild',
+    'BuildComponent.BatchScan',
+    'MorningRUN',
+    'WeeklyRUN',
+    'metric',
+    'dutchie',
+)
 
 # Configure upload folders in Flask app
 app.config['UPLOAD_FOLDER'] = UPLOAD_FOLDER
@@ -54,6 +78,154 @@ app.config['ORDER_COMPLETE_FOLDER'] = ORDER_COMPLETE_FOLDER
 def allowed_file(filename):
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
 
+def warm_up(delay=WARMUP_DELAY):
+    """
+    Import the processors in the background, after giving the server time to
+    start accepting connections. Imports are cached by Python, so the routes'
+    own imports are then free.
+    Args:
+        delay (float): Seconds to wait before importing.
+    Returns:
+        threading.Thread: The warm-up thread.
+    """
+    def run():
+        time.sleep(delay)
+        start = time.perf_counter()
+        for name in PROCESSOR_MODULES:
+            try:
+                importlib.import_module(name)
+            except Exception as e:
+                print(f"Warm-up could not import {name}: {e}")
+        print(f"Warm-up imported {len(PROCESSOR_MODULES)} modules in {time.perf_counter() - start:.2f}s")
+
+    thread = threading.Thread(target=run, name='warm-up', daemon=True)
+    thread.start()
+    return thread
+
+def start_background_work(warmup=WARMUP):
+    """
+    Start what belongs to the serving process rather than to importing the app:
+    resume the jobs a previous process left unfinished and, with MORGO_WARMUP=1,
+    warm up the processors. Called by wsgi.py and the __main__ block.
+    Args:
+        warmup (bool): Whether to start the warm-up thread.
+    """
+    job_queue.resume()
+    if warmup:
+        warm_up()
+
+# Processing shared by the upload endpoints and their asynchronous jobs
+def scan_pdf_file(file_path, progress=None):
+    from BuildComponent.PDFBuild import extract_data, PROCESSOR_VERSION as SCAN_PROCESSOR_VERSION
+    key = cache_key(file_digest(file_path), 'scan-pdf', version=SCAN_PROCESSOR_VERSION)
+    return shared_cache.get_or_compute(
+        key,
+        lambda: extract_data(file_path, progress=progress),
+        cacheable=lambda data: "error" not in data
+    )
+
+def scan_pdf_events(file_path):
+    """
+    Scan a manifest as a stream of events, replaying the cached result when there is one.
+    Args:
+        file_path (str): Path to the PDF file.
+    Yields:
+        dict: PDFBuild.iter_data() events, then {"event": "done"} with the item count and scan time.
+    """
+    from BuildComponent.PDFBuild import iter_data, add_event, iter_result_events, PROCESSOR_VERSION as SCAN_PROCESSOR_VERSION
+    start = time.perf_counter()
+    key = cache_key(file_digest(file_path), 'scan-pdf', version=SCAN_PROCESSOR_VERSION)
+    data = shared_cache.get(key)
+    if data is not None:
+        yield from iter_result_events(data)
+    else:
+        data = {"company": "", "drivers": "", "items": [], "sources": {}}
+        for event in iter_data(file_path):
+            add_event(data, event)
+            yield event
+        if "error" not in data:
+            shared_cache.put(key, data)
+    yield {"event": "done", "item_count": len(data["items"]), "seconds": round(time.perf_counter() - start, 3)}
+
+def morning_file(file_path, location):
+    import MorningRUN
+    key = cache_key(file_digest(file_path), 'morning', version=MorningRUN.PROCESSOR_VERSION,
+                    location=location, date=datetime.date.today().isoformat())
+    return shared_cache.get_or_compute_files(
+        key,
+        lambda: MorningRUN.process_morning_file(file_path, location),
+        app.config['MORNING_COMPLETE_FOLDER']
+    )
+
+def weekly_file(file_path):
+    import WeeklyRUN
+    key = cache_key(file_digest(file_path), 'weekly', version=WeeklyRUN.PROCESSOR_VERSION,
+                    filename=os.path.basename(file_path), date=datetime.date.today().isoformat())
+    return shared_cache.get_or_compute_files(
+        key,
+        lambda: WeeklyRUN.process_weekly_file(file_path),
+        app.config['WEEKLY_COMPLETE_FOLDER']
+    )
+
+def metric_file(input_path):
+    from metric import process_metric_file, PROCESSOR_VERSION as METRIC_PROCESSOR_VERSION
+    output_filename = f'METRIC-{os.path.basename(input_path)[:-4]}.xlsx'
+    output_path = os.path.join(app.config['METRIC_COMPLETE_FOLDER'], output_filename)
+    print(f"Processing Metric file: {input_path} -> {output_path}")
+    key = cache_key(file_digest(input_path), 'metric', version=METRIC_PROCESSOR_VERSION,
+                    filename=output_filename, date=datetime.date.today().isoformat())
+    shared_cache.get_or_compute_files(
+        key,
+        lambda: process_metric_file(input_path, output_path) or output_filename,
+        app.config['METRIC_COMPLETE_FOLDER']
+    )
+    if not os.path.exists(output_path):
+        raise FileNotFoundError(f"Output file not created: {output_path}")
+    print(f"Metric file processed successfully: {output_filename}")
+    return output_filename
+
+# Returns the filenames of the store workbooks built from the export, Marengo first
+def dutchie_file(input_path):
+    from dutchie import process_dutchie_file, clear_output_directory, PROCESSOR_VERSION as DUTCHIE_PROCESSOR_VERSION
+
+    def process():
+        clear_output_directory(app.config['DUTCHIE_COMPLETE_FOLDER'])
+        output_files = process_dutchie_file(input_path)
+        if not output_files:
+            raise RuntimeError(f"Could not process Dutchie export {os.path.basename(input_path)}")
+        return [os.path.basename(output_file) for output_file in output_files]
+
+    key = cache_key(file_digest(input_path), 'dutchie', version=DUTCHIE_PROCESSOR_VERSION,
+                    date=datetime.date.today().isoformat())
+    return shared_cache.get_or_compute_files(key, process, app.config['DUTCHIE_COMPLETE_FOLDER'])
+
+def dutchie_result(filenames):
+    # 'filename' stays for clients that expect a single workbook
+    return {'filenames': filenames, 'filename': filenames[0]}
+
+def validate_location(form):
+    if 'location' not in form:
+        return 'Location not specified'
+    if form['location'] not in ['Marengo', 'Columbus']:
+        return 'Invalid location specified'
+    return None
+
+def scan_pdf_job(file_path, params, progress):
+    data = scan_pdf_file(file_path, progress)
+    if "error" in data:
+        raise RuntimeError(data["error"])
+    return data
+
+job_queue.register('scan-pdf', scan_pdf_job, BUILD_IN_FOLDER, {'pdf'})
+job_queue.register('morning', lambda file_path, params, progress: {'filename': morning_file(file_path, params['location'])},
+                   MORNING_UPLOAD_FOLDER, ALLOWED_EXTENSIONS, validate=validate_location)
+job_queue.register('weekly', lambda file_path, params, progress: {'filename': weekly_file(file_path)},
+                   WEEKLY_UPLOAD_FOLDER, ALLOWED_EXTENSIONS)
+job_queue.register('metric', lambda file_path, params, progress: {'filename': metric_file(file_path)},
+                   METRIC_UPLOAD_FOLDER, ALLOWED_EXTENSIONS)
+job_queue.register('dutchie', lambda file_path, params, progress: dutchie_result(dutchie_file(file_path)),
+                   DUTCHIE_UPLOAD_FOLDER, ALLOWED_EXTENSIONS)
+
 # New endpoint for PDF scanning
 @app.route('/api/scan-pdf', methods=['POST'])
 def scan_pdf():
@@ -71,7 +243,7 @@ def scan_pdf():
             file.save(file_path)
 
             try:
-                data = extract_data(file_path)
+                data = scan_pdf_file(file_path)
                 if "error" in data:
                     return jsonify({'error': data["error"]}), 500
                 return jsonify(data), 200
@@ -83,6 +255,138 @@ def scan_pdf():
         print(f"#ERROR# {e}")
         return jsonify({"error": str(e)}), 500
 
+def save_batch_uploads(files, batch_folder, max_files=BATCH_MAX_FILES, max_zip_bytes=BATCH_MAX_ZIP_BYTES):
+    """
+    Save uploaded PDFs, and the PDFs inside uploaded zip files, to a batch folder.
+    The manifests are counted and the zips' extracted sizes added up from their
+    directories first, so an oversized upload is rejected before anything is written.
+    Args:
+        files (list): Uploaded FileStorage objects.
+        batch_folder (str): Folder the PDFs are written to.
+        max_files (int): Most manifests accepted, counting the PDFs inside zips.
+        max_zip_bytes (int): Most bytes the PDFs inside the zips may take once extracted.
+    Returns:
+        list: (original filename, saved path) pairs, in upload order.
+    """
+    # (filename, uploaded PDF or (zip, member)) for every manifest, in upload order
+    entries = []
+    archives = []
+    try:
+        for file in files:
+            extension = file.filename.rsplit('.', 1)[-1].lower() if '.' in file.filename else ''
+            if extension == 'pdf':
+                entries.append((file.filename, file))
+            elif extension == 'zip':
+                archive = zipfile.ZipFile(file.stream)
+                archives.append(archive)
+                for member in archive.infolist():
+                    name = os.path.basename(member.filename)
+                    if not member.is_dir() and name.lower().endswith('.pdf'):
+                        entries.append((name, (archive, member)))
+            else:
+                raise ValueError(f'Invalid file type: {file.filename}. Only PDF and zip files are allowed')
+
+        if len(entries) > max_files:
+            raise ValueError(f'Too many manifests: {len(entries)} (at most {max_files})')
+        # zipfile stops reading a member at its declared size, so the directory sizes are a real bound
+        zip_bytes = sum(source[1].file_size for name, source in entries if isinstance(source, tuple))
+        if zip_bytes > max_zip_bytes:
+            raise ValueError(f'Zip contents too large: {zip_bytes} bytes extracted (at most {max_zip_bytes})')
+
+        os.makedirs(batch_folder, exist_ok=True)
+        documents = []
+        for name, source in entries:
+            # Prefix with the position so equal names from different zips do not collide
+            path = os.path.join(batch_folder, f'{len(documents):03d}-{secure_filename(name) or "manifest.pdf"}')
+            if isinstance(source, tuple):
+                archive, member = source
+                with archive.open(member) as zipped, open(path, 'wb') as target:
+                    shutil.copyfileobj(zipped, target)
+            else:
+                source.save(path)
+            documents.append((name, path))
+        return documents
+    finally:
+        for archive in archives:
+            archive.close()
+
+# Streaming variant of /api/scan-pdf: NDJSON by default, Server-Sent Events with ?format=sse
+@app.route('/api/scan-pdf/stream', methods=['POST'])
+def scan_pdf_stream():
+    if 'file' not in request.files:
+        return jsonify({'error': 'No file part'}), 400
+
+    file = request.files['file']
+    if file.filename == '':
+        return jsonify({'error': 'No selected file'}), 400
+
+    if not (file and allowed_file(file.filename)):
+        return jsonify({'error': 'Invalid file type, only PDFs are allowed'}), 400
+
+    filename = secure_filename(file.filename)
+    file_path = os.path.join(app.config['BUILD_IN_FOLDER'], filename)
+    file.save(file_path)
+    return event_stream(scan_pdf_events(file_path), request.args.get('format', 'ndjson'))
+
+# Scan several manifests at once, one per core
+@app.route('/api/scan-pdf/batch', methods=['POST'])
+def scan_pdf_batch():
+    files = request.files.getlist('files') or request.files.getlist('file')
+    if not files or all(file.filename == '' for file in files):
+        return jsonify({'error': 'No file part'}), 400
+
+    batch_folder = os.path.join(app.config['BUILD_IN_FOLDER'], f'batch-{uuid.uuid4().hex}')
+    start = time.perf_counter()
+    try:
+        try:
+            documents = save_batch_uploads([file for file in files if file.filename != ''], batch_folder)
+        except (ValueError, zipfile.BadZipFile) as e:
+            return jsonify({'error': str(e)}), 400
+        if not documents:
+            return jsonify({'error': 'No PDF files in the upload'}), 400
+
+        from BuildComponent.PDFBuild import PROCESSOR_VERSION as SCAN_PROCESSOR_VERSION
+        from BuildComponent.BatchScan import scan_batch
+
+        # Only scan the manifests that are not in the result cache yet
+        keys = [cache_key(file_digest(path), 'scan-pdf', version=SCAN_PROCESSOR_VERSION) for name, path in documents]
+        results = [shared_cache.get(key) for key in keys]
+        cached = [result is not None for result in results]
+        missing = [index for index, result in enumerate(results) if result is None]
+        scanned = scan_batch([documents[index][1] for index in missing])
+        for index, result in zip(missing, scanned):
+            results[index] = result
+            if "error" not in result:
+                shared_cache.put(keys[index], {key: value for key, value in result.items() if key != 'seconds'})
+    except Exception as e:
+        print(f"#ERROR# {e}")
+        return jsonify({'error': str(e)}), 500
+    finally:
+        shutil.rmtree(batch_folder, ignore_errors=True)
+
+    manifests = []
+    companies = []
+    drivers = []
+    for (name, path), result, was_cached in zip(documents, results, cached):
+        manifest = {'filename': name, 'cached': was_cached, 'seconds': result.get('seconds', 0.0)}
+        manifest.update({key: value for key, value in result.items() if key != 'seconds'})
+        manifests.append(manifest)
+        if "error" in result:
+            continue
+        if result['company'] and result['company'] != "Not Found":
+            companies.append(result['company'])
+        if result['drivers'] and result['drivers'] != "Not Found":
+            drivers.extend(result['drivers'].split(" / "))
+
+    return jsonify({
+        'manifests': manifests,
+        'companies': list(dict.fromkeys(companies)),
+        'drivers': list(dict.fromkeys(drivers)),
+        'item_count': sum(len(manifest['items']) for manifest in manifests),
+        'failed': sum(1 for manifest in manifests if "error" in manifest),
+        'seconds': round(time.perf_counter() - start, 3)
+    }), 200
+
 # Existing Routes
 @app.route('/send-email', methods=['POST'])
 def handle_email():
@@ -111,12 +415,11 @@ def upload_morning_file():
     if file.filename == '':
         return jsonify({'error': 'No selected file'}), 400
 
-    if 'location' not in request.form:
-        return jsonify({'error': 'Location not specified'}), 400
+    error = validate_location(request.form)
+    if error:
+        return jsonify({'error': error}), 400
 
     location = request.form['location']
-    if location not in ['Marengo', 'Columbus']:
-        return jsonify({'error': 'Invalid location specified'}), 400
 
     if file and allowed_file(file.filename):
         filename = secure_filename(file.filename)
@@ -124,7 +427,7 @@ def upload_morning_file():
         file.save(file_path)
 
         try:
-            processed_filename = MorningRUN.process_morning_file(file_path, location)
+            processed_filename = morning_file(file_path, location)
             return jsonify({'filename': processed_filename}), 200
         except Exception as e:
             return jsonify({'error': str(e)}), 500
@@ -151,7 +454,7 @@ def upload_weekly_file():
         file.save(file_path)
 
         try:
-            processed_filename = WeeklyRUN.process_weekly_file(file_path)
+            processed_filename = weekly_file(file_path)
             return jsonify({'filename': processed_filename}), 200
         except Exception as e:
             return jsonify({'error': str(e)}), 500
@@ -179,13 +482,7 @@ def upload_metric_file():
         file.save(input_path)
 
         try:
-            output_filename = f'METRIC-{filename[:-4]}.xlsx'
-            output_path = os.path.join(app.config['METRIC_COMPLETE_FOLDER'], output_filename)
-            print(f"Processing Metric file: {input_path} -> {output_path}")
-            process_metric_file(input_path, output_path)
-            if not os.path.exists(output_path):
-                raise FileNotFoundError(f"Output file not created: {output_path}")
-            print(f"Metric file processed successfully: {output_filename}")
+            output_filename = metric_file(input_path)
             return jsonify({'filename': output_filename}), 200
         except Exception as e:
             print(f"Error processing Metric file: {str(e)}")
@@ -222,13 +519,7 @@ def upload_dutchie_file():
         file.save(input_path)
 
         try:
-            clear_output_directory(app.config['DUTCHIE_COMPLETE_FOLDER'])
-            process_dutchie_file(input_path, None)
-            current_date = datetime.date.today().strftime("%m-%d-%Y")
-            marengo_filename = f'Marengo-Dutchie-{current_date}.xlsx'
-            columbus_filename = f'Columbus-Dutchie-{current_date}.xlsx'
-            output_filename = marengo_filename if os.path.exists(os.path.join(app.config['DUTCHIE_COMPLETE_FOLDER'], marengo_filename)) else columbus_filename
-            return jsonify({'filename': output_filename}), 200
+            return jsonify(dutchie_result(dutchie_file(input_path))), 200
         except Exception as e:
             return jsonify({'error': str(e)}), 500
 
@@ -254,4 +545,8 @@ if __name__ == '__main__':
     os.makedirs(DUTCHIE_COMPLETE_FOLDER, exist_ok=True)
     os.makedirs(ORDER_COMPLETE_FOLDER, exist_ok=True)
 
+    # The debug reloader runs the app in a child process; only the one that serves resumes jobs and warms up
+    if os.environ.get('WERKZEUG_RUN_MAIN') == 'true':
+        start_background_work()
+
     app.run(debug=True, host='0.0.0.0', port=5000)
\ No newline at end of file
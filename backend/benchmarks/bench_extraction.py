@@ -0,0 +1,242 @@
+"""
+Benchmark the PDF extraction stack on synthetic and sample manifests.
+
+For every case (a generated manifest of each size and mode, plus every PDF
+in BUILD-IN/ that has ground truth in benchmarks/ground_truth/) a fresh
+process times each stage separately: opening the manifest,
+OriginatingEntity, Drivers, MNumber, buildscan.extract_manifest_data and
+pdf_extractor.extract_data_from_pdf. It records the process's peak RSS after
+every stage and scores each extractor against the ground truth. Results are
+written as JSON so two runs can be compared. Run from the backend directory:
+
+    python benchmarks/bench_extraction.py --sizes 5 50 500 --modes text image
+    python benchmarks/bench_extraction.py --sizes 50 --modes text --output before.json
+"""
+import os
+import sys
+import json
+import time
+import glob
+import argparse
+import platform
+import resource
+import datetime
+import subprocess
+import multiprocessing
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BENCHMARK_DIR = os.path.join(BACKEND_DIR, "benchmarks")
+GROUND_TRUTH_DIR = os.path.join(BENCHMARK_DIR, "ground_truth")
+SAMPLE_DIR = os.path.join(BACKEND_DIR, "BUILD-IN")
+RESULTS_DIR = os.path.join(BENCHMARK_DIR, "results")
+
+sys.path.insert(0, BACKEND_DIR)
+sys.path.insert(0, BENCHMARK_DIR)
+
+ITEM_FIELDS = ["Package_ID", "Name", "Strain", "Days", "Weight", "Category"]
+
+
+def _peak_rss_mb():
+    # Linux keeps ru_maxrss across fork and exec, so a fresh process would report
+    # its parent's peak; VmHWM starts over with the new address space
+    try:
+        with open("/proc/self/status", "r") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return round(int(line.split()[1]) / 1024, 1)
+    except OSError:
+        pass
+    # ru_maxrss is in kilobytes on Linux and bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def _ratio(hits, total):
+    return round(hits / total, 4) if total else None
+
+
+def score_items(items, truth):
+    expected = {package["M_Number"]: package for package in truth["packages"]}
+    found = {item["M_Number"]: item for item in items if item["M_Number"] in expected}
+    exact = sum(1 for m_number, item in found.items()
+                if all(item[field] == expected[m_number][field] for field in ITEM_FIELDS))
+    field_hits = {field: sum(1 for m_number, item in found.items() if item[field] == expected[m_number][field])
+                  for field in ITEM_FIELDS}
+    return {
+        "recall": _ratio(len(found), len(expected)),
+        "exact": _ratio(exact, len(expected)),
+        "fields": {field: _ratio(hits, len(expected)) for field, hits in field_hits.items()},
+        "extra": len(items) - len(found),
+    }
+
+
+def score_buildscan(data, truth):
+    expected = {package["M_Number"]: package for package in truth["packages"]}
+    found = {product["m_number"]: product for product in data["products"] if product["m_number"] in expected}
+    return {
+        "recall": _ratio(len(found), len(expected)),
+        "package_id": _ratio(sum(1 for m_number, product in found.items()
+                                 if product["package_id"] == expected[m_number]["Package_ID"]), len(expected)),
+        "days": _ratio(sum(1 for m_number, product in found.items()
+                           if product["supply_days"] == expected[m_number]["Days"]), len(expected)),
+    }
+
+
+def score_pdf_extractor(items, truth):
+    expected = {package["M_Number"]: package for package in truth["packages"]}
+    found = {item["m_number"]: item for item in items if item["m_number"] in expected}
+    return {
+        "recall": _ratio(len(found), len(expected)),
+        "days": _ratio(sum(1 for m_number, item in found.items() if item["days"] == expected[m_number]["Days"]),
+                       len(expected)),
+    }
+
+
+def _stage(stages, name, run, score=None):
+    start = time.perf_counter()
+    try:
+        value = run()
+        stage = {"seconds": round(time.perf_counter() - start, 4)}
+        if score is not None:
+            stage["accuracy"] = score(value)
+    except Exception as e:
+        value = None
+        stage = {"seconds": round(time.perf_counter() - start, 4), "error": f"{type(e).__name__}: {e}"}
+    stage["peak_rss_mb"] = _peak_rss_mb()
+    stages[name] = stage
+    return value
+
+
+def run_case(pdf_path, truth):
+    """
+    Time every extraction stage on one manifest. Meant to run in a fresh process
+    so the peak RSS belongs to this case alone.
+    Args:
+        pdf_path (str): Manifest to scan.
+        truth (dict): Ground truth with company, drivers and packages.
+    Returns:
+        dict: Per-stage seconds, peak RSS (MB) and accuracy.
+    """
+    from BuildComponent.ManifestDocument import ManifestDocument
+    from BuildComponent.PDFBuild import extract_company, extract_driver_names
+    from BuildComponent.MNumber import extract_m_numbers
+    from buildscan import extract_manifest_data
+    from pdf_extractor import extract_data_from_pdf
+
+    stages = {"import": {"peak_rss_mb": _peak_rss_mb()}}
+    start = time.perf_counter()
+
+    doc = _stage(stages, "open", lambda: ManifestDocument(pdf_path))
+    if doc is not None:
+        with doc:
+            _stage(stages, "pages", lambda: doc.page_count)
+            _stage(stages, "company", lambda: extract_company(doc),
+                   lambda result: {"correct": result[0] == truth["company"], "tier": result[2]})
+            _stage(stages, "drivers", lambda: extract_driver_names(doc),
+                   lambda result: {"recall": _ratio(len(set(truth["drivers"]) & set(result[0])), len(truth["drivers"])),
+                                   "tier": result[2]})
+            _stage(stages, "items", lambda: extract_m_numbers(doc)[1], lambda items: score_items(items, truth))
+    scan_seconds = time.perf_counter() - start
+
+    _stage(stages, "buildscan", lambda: extract_manifest_data(pdf_path), lambda data: score_buildscan(data, truth))
+    _stage(stages, "pdf_extractor", lambda: extract_data_from_pdf(pdf_path),
+           lambda result: score_pdf_extractor(result[2], truth))
+
+    return {"scan_seconds": round(scan_seconds, 4), "peak_rss_mb": _peak_rss_mb(), "stages": stages}
+
+
+def _run_case_in_child(conn, pdf_path, truth):
+    try:
+        conn.send(run_case(pdf_path, truth))
+    except Exception as e:
+        conn.send({"error": f"{type(e).__name__}: {e}"})
+    finally:
+        conn.close()
+
+
+def _cases(sizes, modes, workdir, seed):
+    from manifest_gen import write_manifest
+
+    for packages in sizes:
+        for mode in modes:
+            pdf_path = os.path.join(workdir, f"synthetic-{packages}-{mode}.pdf")
+            start = time.perf_counter()
+            truth = write_manifest(pdf_path, packages, mode, seed)
+            print(f"Generated {os.path.basename(pdf_path)} in {time.perf_counter() - start:.2f}s")
+            yield {"name": f"synthetic-{packages}-{mode}", "packages": packages, "mode": mode}, pdf_path, truth
+
+    for pdf_path in sorted(glob.glob(os.path.join(SAMPLE_DIR, "*.pdf"))):
+        truth_path = os.path.join(GROUND_TRUTH_DIR, os.path.splitext(os.path.basename(pdf_path))[0] + ".json")
+        if not os.path.exists(truth_path):
+            continue
+        with open(truth_path, "r", encoding="utf-8") as f:
+            truth = json.load(f)
+        yield {"name": f"sample-{os.path.basename(pdf_path)}", "packages": len(truth["packages"]), "mode": "sample"}, pdf_path, truth
+
+
+def _git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=BACKEND_DIR, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[5, 50, 500])
+    parser.add_argument("--modes", nargs="+", choices=["text", "image"], default=["text", "image"])
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workdir", default=os.path.join(RESULTS_DIR, "manifests"),
+                        help="Where the generated manifests are written")
+    parser.add_argument("--output", help="JSON file for the results (default: benchmarks/results/extraction-<time>.json)")
+    args = parser.parse_args()
+
+    os.makedirs(args.workdir, exist_ok=True)
+    os.makedirs(RESULTS_DIR, exist_ok=True)
+    os.chdir(BACKEND_DIR)
+
+    results = {
+        "started_at": datetime.datetime.now().isoformat(timespec="seconds"),
+        "commit": _git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "cases": [],
+    }
+
+    context = multiprocessing.get_context("spawn")
+    for case, pdf_path, truth in _cases(args.sizes, args.modes, args.workdir, args.seed):
+        # A fresh process per case, so imports and peak RSS are not shared between
+        # cases. It is not a daemon, so the OCR and Camelot pools can start inside it.
+        parent_conn, child_conn = context.Pipe()
+        process = context.Process(target=_run_case_in_child, args=(child_conn, pdf_path, truth))
+        process.start()
+        child_conn.close()
+        try:
+            outcome = parent_conn.recv()
+        except EOFError:
+            # The child died before sending anything (a crash in native code, or killed)
+            outcome = None
+        parent_conn.close()
+        process.join()
+        if outcome is None:
+            outcome = {"error": f"case process exited with code {process.exitcode} without a result"}
+        case.update(outcome)
+        results["cases"].append(case)
+        if "error" in case:
+            print(f"{case['name']:<40} failed: {case['error']}")
+            continue
+
+        items = case["stages"].get("items", {})
+        print(f"{case['name']:<40} scan {case['scan_seconds']:8.3f}s  peak {case['peak_rss_mb']:7.1f} MB  "
+              f"items recall {items.get('accuracy', {}).get('recall')}  exact {items.get('accuracy', {}).get('exact')}")
+
+    output = args.output or os.path.join(RESULTS_DIR, f"extraction-{datetime.datetime.now():%Y%m%d-%H%M%S}.json")
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2)
+    print(f"Results written to {output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+"""
+Microbenchmark for parsing METRC Item Details.
+
+Builds a synthetic 500-package manifest and times the per-block cost of the
+shared ManifestGrammar parser against the per-field regex searches MNumber
+used before it. Run from the backend directory:
+
+    python benchmarks/bench_grammar.py [--packages 500] [--repeat 20]
+"""
+import os
+import re
+import sys
+import time
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from BuildComponent.ManifestGrammar import VALID_WEIGHTS, find_item_details, parse_item_details
+
+DETAILS_TEMPLATES = [
+    "Strain: {name} | Brand: Plant Mat - Hybrid - 35 - {name} | THC: 35% | Wgt: 2.83 g | Supply: 1 day(s)",
+    "Strain: {name} | Brand: Plant Mat - Indica - 28 - {name} | THC: 28% | Wgt: 14.15 g | Supply: 5 day(s)",
+    "Brand: {name} Vap Cart - Sativa | THC: 81.2% | Qty: 1 ea | Supply: 3 day(s)",
+    "Brand: {name} Oil for Oral | CBD: 1.1 mg | THC: 10 mg | Qty: 30 ml | Supply: 10 day(s)",
+    "Brand: {name} Edb Oral Gummies | THC: 100 mg | Qty: 10 ea | Supply: 2 day(s)",
+    "Brand: {name} Topical Balm | THC: 50 mg | Qty: 1 ea",
+    # Labels inside longer keys, other fields' values, mixed case and blank values
+    "Strain: {name} | Brand: Plant Mat - Indica - 30 - {name} | THC: 30% | Net Wgt: 2.83 g | Days Supply: 30 day(s)",
+    "Brand: {name} Edb Oral Chews | THC: 5 mg | Unit Qty: 10 ea | Days Supply: 4 day(s)",
+    "Brand: {name} Vap Pod - Note: Supply: limited | Wgt: 0.5 g | Qty: 1 ea | Supply: 6 day(s)",
+    "brand: {name} Lotion | Wgt:| Qty:   | QTY: 2 ea | supply: 7 DAY(S)",
+    "Strain: | Brand: {name} | Wgt: 5.66 g Wgt: 1 g | Supply:9 day(s) | Qty: 1 ea",
+    "{name} Cream | Note: Net Wgt: 14.15 g | Gross Wgt: 16 g",
+]
+
+
+def build_blocks(packages):
+    blocks = []
+    for index in range(packages):
+        details = DETAILS_TEMPLATES[index % len(DETAILS_TEMPLATES)].format(name=f"Strain {index}")
+        blocks.append(
+            f"{index + 1}. Package | Shipped Production Batch No. Item Name Quantity\n"
+            f"1A407030000300D{index:09d} M{index:011d}: Plant Mat - Hybrid - 35 - Strain Shp: 169.8 g\n"
+            f"Lab Test: TestPassed\n"
+            f"Item Details {details}\n"
+            f"Source Harvest Strain {index}-070924-F7-140\n"
+            f"Source Package(s) 1A407150000300D000015996\n"
+        )
+    return blocks
+
+
+def legacy_parse(block):
+    # The per-field searches MNumber ran before ManifestGrammar, kept for comparison
+    item_details_match = re.search(r"Item Details\s*(.*?)(?=\nSource\s*(Harvest|Package)|$|\n\d+\.\s*Package\s*[|]?\s*Shipped)", block, re.DOTALL | re.IGNORECASE)
+    item_details = item_details_match.group(1).strip()
+    name = strain = days = weight = category = None
+    name_match = re.match(r"(?:Brand|Strain):\s*([^|]+)", item_details)
+    name = name_match.group(1).strip() if name_match else "Not Found"
+    item_details_lower = item_details.lower()
+    if "indica" in item_details_lower:
+        strain = "Indica"
+    elif "sativa" in item_details_lower:
+        strain = "Sativa"
+    elif "hybrid" in item_details_lower:
+        strain = "Hybrid"
+    else:
+        strain = "Not Specified"
+    days_match = re.search(r"Supply:\s*(\d+)\s*day\(s\)", item_details, re.IGNORECASE)
+    days = days_match.group(1) if days_match else "Not Specified"
+    weight_match = re.search(r"Wgt:\s*([^|]+)", item_details, re.IGNORECASE)
+    numeric_weight = re.match(r"(\d+\.\d+)", weight_match.group(1).strip()) if weight_match else None
+    if numeric_weight and numeric_weight.group(1) in VALID_WEIGHTS:
+        weight = weight_match.group(1).strip()
+        category = "Flower"
+    else:
+        qty_match = re.search(r"Qty:\s*([^|]+)", item_details, re.IGNORECASE)
+        weight = qty_match.group(1).strip() if qty_match else "Not Specified"
+        if "oil for oral" in item_details_lower:
+            category = "Tincture"
+        elif "balm" in item_details_lower or "lotion" in item_details_lower or "cream" in item_details_lower or "topical" in item_details_lower or "gel" in item_details_lower:
+            category = "Topical"
+        elif "edb oral" in item_details_lower:
+            category = "Edible"
+        elif "vap " in item_details_lower:
+            category = "Vape"
+        else:
+            category = "Unspecified"
+    return (name, strain, days, weight, category)
+
+
+def grammar_parse(block):
+    return tuple(parse_item_details(find_item_details(block)))[:5]
+
+
+def time_per_block(parse, blocks, repeat):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for block in blocks:
+            parse(block)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best / len(blocks)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--packages", type=int, default=500)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    blocks = build_blocks(args.packages)
+    mismatches = [block for block in blocks if legacy_parse(block) != grammar_parse(block)]
+    if mismatches:
+        print(f"{len(mismatches)} blocks parse differently, e.g.:\n{mismatches[0]}")
+        sys.exit(1)
+
+    legacy = time_per_block(legacy_parse, blocks, args.repeat)
+    grammar = time_per_block(grammar_parse, blocks, args.repeat)
+    print(f"{args.packages} packages, best of {args.repeat} runs")
+    print(f"  per-field regex:  {legacy * 1e6:8.2f} us/block  {legacy * args.packages * 1e3:8.2f} ms/manifest")
+    print(f"  ManifestGrammar:  {grammar * 1e6:8.2f} us/block  {grammar * args.packages * 1e3:8.2f} ms/manifest")
+    print(f"  speedup:          {legacy / grammar:8.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""
+Report what importing the app costs, from Python's -X importtime output.
+
+Each module is imported in a fresh interpreter, so nothing is shared between
+runs. The report lists the slowest imports by cumulative time and flags any of
+the heavy processor dependencies that were loaded, which should only happen
+on first use of a route (or in the MORGO_WARMUP thread). With --budget-ms the
+script exits non-zero when the import takes longer. Run from the backend
+directory:
+
+    python benchmarks/import_time.py
+    python benchmarks/import_time.py --module app --budget-ms 500 --top 30
+    python benchmarks/import_time.py --module BuildComponent.PDFBuild --output pdfbuild.json
+"""
+import os
+import sys
+import json
+import argparse
+import subprocess
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Dependencies that must not be loaded by importing the app
+HEAVY_MODULES = ("pandas", "numpy", "fitz", "pymupdf", "pdfplumber", "pdfminer", "openpyxl", "pytesseract",
+                 "camelot", "cv2", "PIL")
+
+
+def measure(module, repeat=3):
+    """
+    Import a module in fresh interpreters and keep the fastest run.
+    Args:
+        module (str): Module to import, e.g. "app".
+        repeat (int): Number of runs; the fastest one is reported, as the others
+            mostly measure a cold disk cache.
+    Returns:
+        dict: total_ms, imports (module, self_ms, cumulative_ms, depth) in import
+        order, and the heavy modules that were loaded.
+    """
+    best = None
+    for _ in range(repeat):
+        completed = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+            cwd=BACKEND_DIR, capture_output=True, text=True
+        )
+        if completed.returncode != 0:
+            raise RuntimeError(f"Importing {module} failed:\n{completed.stderr[-2000:]}")
+
+        imports = []
+        for line in completed.stderr.splitlines():
+            if not line.startswith("import time:") or "self [us]" in line:
+                continue
+            self_us, cumulative_us, name = line[len("import time:"):].split("|")
+            imports.append({
+                "module": name.strip(),
+                "self_ms": int(self_us) / 1000,
+                "cumulative_ms": int(cumulative_us) / 1000,
+                "depth": (len(name) - len(name.lstrip()) - 1) // 2,
+            })
+        run = {
+            "total_ms": next((entry["cumulative_ms"] for entry in reversed(imports) if entry["module"] == module), 0.0),
+            "imports": imports,
+        }
+        if best is None or run["total_ms"] < best["total_ms"]:
+            best = run
+
+    loaded = {entry["module"].split(".")[0] for entry in best["imports"]}
+    best["heavy"] = [name for name in HEAVY_MODULES if name in loaded]
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--module", default="app")
+    parser.add_argument("--top", type=int, default=20, help="How many of the slowest imports to list")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--budget-ms", type=float, help="Fail when the import takes longer than this")
+    parser.add_argument("--output", help="Also write the full report as JSON")
+    args = parser.parse_args()
+
+    report = measure(args.module, args.repeat)
+    print(f"import {args.module}: {report['total_ms']:.1f} ms (best of {args.repeat})")
+    print(f"{'cumulative ms':>14} {'self ms':>9}  module")
+    for entry in sorted(report["imports"], key=lambda entry: entry["cumulative_ms"], reverse=True)[:args.top]:
+        print(f"{entry['cumulative_ms']:14.1f} {entry['self_ms']:9.1f}  {'  ' * entry['depth']}{entry['module']}")
+    if report["heavy"]:
+        print(f"Heavy modules loaded at import: {', '.join(report['heavy'])}")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"module": args.module, "budget_ms": args.budget_ms, **report}, f, indent=2)
+
+    if args.budget_ms is not None and report["total_ms"] > args.budget_ms:
+        print(f"Over budget: {report['total_ms']:.1f} ms > {args.budget_ms:.1f} ms")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
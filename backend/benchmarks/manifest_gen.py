@@ -0,0 +1,190 @@
+"""
+Synthetic METRC transfer manifests for benchmarking the PDF extraction stack.
+
+Each manifest is written with the same line layout pdfplumber reads from real
+METRC "Transfer Form (OH)" PDFs: the originating entity and driver on page 1,
+then one block per package with its Package ID, M Number, Item Details and
+Source lines. The text-layer variant is drawn with PyMuPDF; the image-only
+variant rasterizes those pages so no text layer is left. Ground truth is
+returned alongside, in the field names MNumber reports.
+
+    python benchmarks/manifest_gen.py --packages 50 --mode image --output /tmp/m50.pdf
+"""
+import os
+import sys
+import json
+import random
+import argparse
+
+import fitz
+
+PAGE_WIDTH = 612
+PAGE_HEIGHT = 792
+MARGIN = 36
+FONT_SIZE = 7.5
+LINE_HEIGHT = 11
+# Resolution of the image-only variant
+IMAGE_DPI = 200
+
+STRAINS = ["Indica", "Sativa", "Hybrid"]
+NAMES = ["Alien Mintz", "Cadillac Rainbows", "Shady Boof", "Gelato Cake", "Lemon Haze", "Blue Dream",
+         "Purple Punch", "Sour Diesel", "Wedding Crasher", "Zkittlez", "Apple Fritter", "Ice Cream Cake"]
+FLOWER_WEIGHTS = ["2.83", "5.66", "8.49", "11.32", "14.15"]
+# (name as printed, name the scan reports once the legal suffix is stripped)
+COMPANIES = [("Green Investment Partners, LLC", "Green Investment Partners"),
+             ("Buckeye Relief, LLC", "Buckeye Relief"),
+             ("Ohio Grown Therapies, LLC", "Ohio Grown Therapies")]
+DRIVERS = ["Jordan Smith", "Casey Lee", "Riley Brown", "unknown"]
+
+
+def _package(rng, index):
+    name = f"{rng.choice(NAMES)} {index}"
+    strain = rng.choice(STRAINS)
+    kind = rng.choices(["flower", "vape", "tincture", "edible", "topical"], weights=[6, 2, 1, 1, 1])[0]
+    thc = round(rng.uniform(15, 90), 1)
+    days = str(rng.randint(1, 30))
+
+    if kind == "flower":
+        weight = f"{rng.choice(FLOWER_WEIGHTS)} g"
+        brand = f"Plant Mat - {strain} - {thc} - {name}"
+        item_name = f"Plant Mat - {strain} - {thc} - {name} - {weight[:-2]}"
+        details = f"Strain: {name} | Brand: {brand} | THC: {thc}% | Wgt: {weight} | Supply: {days} day(s)"
+        category = "Flower"
+    else:
+        weight = f"{rng.randint(1, 30)} ea"
+        product = {"vape": "Vap Cart", "tincture": "Oil for Oral", "edible": "Edb Oral Gummies", "topical": "Topical Balm"}[kind]
+        brand = f"{name} {product} - {strain}"
+        item_name = f"{product} - {strain} - {name}"
+        details = f"Brand: {brand} | THC: {thc} mg | Qty: {weight} | Supply: {days} day(s)"
+        category = {"vape": "Vape", "tincture": "Tincture", "edible": "Edible", "topical": "Topical"}[kind]
+        # MNumber names a package after the first Item Details field, here the brand
+        name = brand
+
+    return {
+        "Package_ID": f"1A4070300003{rng.randint(0, 999):03d}D{index:09d}",
+        "M_Number": f"M{rng.randint(1, 10 ** 8):011d}",
+        "Name": name,
+        "Strain": strain,
+        "Days": days,
+        "Weight": weight,
+        "Category": category,
+        "Item_Details": details,
+        "Item_Name": item_name,
+    }
+
+
+def generate_ground_truth(packages, seed=0):
+    """
+    Build the contents of a synthetic manifest.
+    Args:
+        packages (int): Number of packages.
+        seed (int): Random seed, so runs are reproducible.
+    Returns:
+        dict: printed_company, company (as the scan reports it), drivers and
+        packages (with MNumber's field names).
+    """
+    rng = random.Random(seed)
+    seen = set()
+    items = []
+    for index in range(1, packages + 1):
+        package = _package(rng, index)
+        while package["M_Number"] in seen:
+            package["M_Number"] = f"M{rng.randint(1, 10 ** 8):011d}"
+        seen.add(package["M_Number"])
+        items.append(package)
+    printed_company, company = rng.choice(COMPANIES)
+    return {
+        "printed_company": printed_company,
+        "company": company,
+        "drivers": [rng.choice(DRIVERS)],
+        "packages": items,
+    }
+
+
+def _lines(truth):
+    lines = [
+        ("Transfer Form (OH)", 11),
+        ("Manifest No. 0004567890", FONT_SIZE),
+        (f"Originating Entity {truth['printed_company']} For Agency Use Only", FONT_SIZE),
+        ("Originating License Number CCC000000-00", FONT_SIZE),
+        ("Address of Originating Entity 100 Main St", FONT_SIZE),
+        (f"Name of Person Transporting {truth['drivers'][0]} Employee ID of Driver unknown", FONT_SIZE),
+        ("Make, Model, License Plate No. Ford Transit T150 PMN7118 Leg of Layover Trip", FONT_SIZE),
+    ]
+    for index, package in enumerate(truth["packages"], start=1):
+        lines.append((None, None))  # keep a package block on one page where possible
+        lines.extend([
+            (f"{index}. Package | Shipped Production Batch No. Item Name Quantity", FONT_SIZE),
+            (f"{package['Package_ID']} {package['M_Number']}: {package['Item_Name']} Shp: 169.8 g", FONT_SIZE),
+            ("Lab Test: TestPassed", FONT_SIZE),
+            (f"Item Details {package['Item_Details']}", FONT_SIZE),
+            (f"Source Harvest {package['Name']}-070924-F7-140", FONT_SIZE),
+            (f"Source Package(s) 1A407150000300D{index:09d}", FONT_SIZE),
+        ])
+    return lines
+
+
+def _draw(truth):
+    doc = fitz.open()
+    page = None
+    y = PAGE_HEIGHT
+    block_height = 6 * LINE_HEIGHT
+    for text, size in _lines(truth):
+        if text is None:
+            if y + block_height > PAGE_HEIGHT - MARGIN:
+                y = PAGE_HEIGHT
+            continue
+        if y + LINE_HEIGHT > PAGE_HEIGHT - MARGIN:
+            page = doc.new_page(width=PAGE_WIDTH, height=PAGE_HEIGHT)
+            y = MARGIN + LINE_HEIGHT
+        page.insert_text((MARGIN, y), text, fontsize=size, fontname="helv")
+        y += LINE_HEIGHT
+    return doc
+
+
+def _rasterize(doc):
+    image_doc = fitz.open()
+    for page in doc:
+        pixmap = page.get_pixmap(dpi=IMAGE_DPI, colorspace=fitz.csGRAY)
+        image_page = image_doc.new_page(width=page.rect.width, height=page.rect.height)
+        image_page.insert_image(image_page.rect, pixmap=pixmap)
+    return image_doc
+
+
+def write_manifest(path, packages, mode="text", seed=0):
+    """
+    Write a synthetic manifest PDF.
+    Args:
+        path (str): Output PDF path.
+        packages (int): Number of packages.
+        mode (str): "text" for a text layer, or "image" for scanned-looking pages without one.
+        seed (int): Random seed.
+    Returns:
+        dict: The ground truth written into the PDF.
+    """
+    truth = generate_ground_truth(packages, seed)
+    doc = _draw(truth)
+    if mode == "image":
+        text_doc, doc = doc, _rasterize(doc)
+        text_doc.close()
+    doc.save(path, garbage=3, deflate=True)
+    doc.close()
+    return truth
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--packages", type=int, default=50)
+    parser.add_argument("--mode", choices=["text", "image"], default="text")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", required=True, help="PDF to write; the ground truth goes next to it as .json")
+    args = parser.parse_args()
+
+    truth = write_manifest(args.output, args.packages, args.mode, args.seed)
+    with open(os.path.splitext(args.output)[0] + ".json", "w", encoding="utf-8") as f:
+        json.dump(truth, f, indent=2)
+    print(f"Wrote {args.output} ({args.packages} packages, {args.mode})")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,104 @@
+"""
+Compare the per-row cost of writing a styled count sheet the old way (a regular
+worksheet with new Font, Border and Alignment objects set on every cell) and
+through report_writer.ReportWriter (a write-only worksheet with named styles).
+Both write the same rows, styled like the weekly count, and include the save.
+Run from the backend directory:
+
+    python benchmarks/report_write.py
+    python benchmarks/report_write.py --rows 50000 --columns 12 --memory
+"""
+import os
+import sys
+import time
+import argparse
+import tempfile
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from openpyxl import Workbook
+from openpyxl.styles import Font, Alignment, Border, Side
+from report_writer import ReportWriter
+
+
+def sample_rows(rows, columns):
+    header = [f"Column {c}" for c in range(1, columns + 1)]
+    body = ([f"Vendor {r % 40}", f"Product {r}", f"{r % 10000:04d}"] + [r % 97] * (columns - 3)
+            for r in range(rows))
+    return header, body
+
+
+def write_per_cell(path, rows, columns):
+    """The pattern MorningRUN and WeeklyRUN used before the report writer."""
+    wb = Workbook()
+    ws = wb.active
+    header, body = sample_rows(rows, columns)
+    for r_idx, row in enumerate([header, *body], 1):
+        ws.append(row)
+        for c_idx, cell in enumerate(ws[r_idx], 1):
+            cell.font = Font(bold=True)
+            cell.border = Border(left=Side(style='thin'), right=Side(style='thin'),
+                                 top=Side(style='thin'), bottom=Side(style='thin'))
+            if c_idx in [1, 2]:
+                cell.alignment = Alignment(horizontal='left', vertical='center')
+            else:
+                cell.alignment = Alignment(horizontal='center', vertical='center')
+    wb.save(path)
+
+
+def write_report_writer(path, rows, columns):
+    writer = ReportWriter({"orientation": "landscape", "title_rows": "1:1"})
+    styles = ["Count Text"] * 2 + ["Count Value"] * (columns - 2)
+    header, body = sample_rows(rows, columns)
+    writer.append(header, styles)
+    for row in body:
+        writer.append(row, styles)
+    writer.save(path)
+
+
+WRITERS = {"per-cell styles": write_per_cell, "report writer": write_report_writer}
+
+
+def measure(write, rows, columns, memory=False):
+    """
+    Time one write (and optionally its peak traced memory, which slows it down).
+    Returns:
+        tuple: (seconds, peak MiB or None).
+    """
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "out.xlsx")
+        if memory:
+            tracemalloc.start()
+        start = time.perf_counter()
+        write(path, rows, columns)
+        elapsed = time.perf_counter() - start
+        peak = None
+        if memory:
+            peak = tracemalloc.get_traced_memory()[1] / 2 ** 20
+            tracemalloc.stop()
+    return elapsed, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=5000)
+    parser.add_argument("--columns", type=int, default=12)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--memory", action="store_true", help="Also report peak memory (separate, slower run)")
+    args = parser.parse_args()
+
+    print(f"{args.rows} rows x {args.columns} columns, best of {args.repeat}")
+    results = {}
+    for name, write in WRITERS.items():
+        best = min(measure(write, args.rows, args.columns)[0] for _ in range(args.repeat))
+        line = f"{name:>16}: {best:7.2f} s  {best / args.rows * 1e6:8.1f} us/row"
+        if args.memory:
+            line += f"  peak {measure(write, args.rows, args.columns, memory=True)[1]:7.1f} MiB"
+        print(line)
+        results[name] = best
+    print(f"speedup: {results['per-cell styles'] / results['report writer']:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,32 +1,49 @@
 import os
 import re
-import pdfplumber
+import time
 from flask import Blueprint, request, jsonify
 from werkzeug.utils import secure_filename
+from result_cache import shared_cache, cache_key, file_digest
+from streaming import event_stream
 
 buildscan_bp = Blueprint('buildscan', __name__)
 
 UPLOAD_FOLDER = 'BUILD-IN'
 ALLOWED_EXTENSIONS = {'pdf'}
 
+# THC, then Wgt, then Supply, anywhere in the block and across its lines
+THC_WEIGHT_SUPPLY = re.compile(r'THC: ([\d.]+)%?.*?Wgt: ([\d.]+ g).*?Supply: ([\d.]+) day\(s\)', re.DOTALL)
+
+# Bump when the formatted scan result changes, so cached results are not reused
+PROCESSOR_VERSION = 2
+
 def allowed_file(filename):
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
 
-def extract_manifest_data(pdf_path):
-    data = {
-        "originating_entity": None,
-        "drivers": [],
-        "products": []
-    }
-
-    with pdfplumber.open(pdf_path) as pdf:
-        for page in pdf.pages:
-            text = page.extract_text()
+def iter_manifest_data(pdf_path):
+    """
+    Read a manifest page by page, yielding each field as soon as its page is read.
+    Args:
+        pdf_path (str): Path to the PDF file.
+    Yields:
+        tuple: ('originating_entity', name), ('driver', {name, employee_id}) or
+        ('product', product dict from extract_product_data()).
+    """
+    # Imported on first scan to keep app startup fast
+    from BuildComponent.ManifestDocument import ManifestDocument
+    from BuildComponent.PageTriage import page_text
+
+    entity_found = False
+    with ManifestDocument(pdf_path) as doc:
+        for page_number in range(doc.page_count):
+            # Digital pages come from the text layer, scanned ones from OCR
+            text = page_text(doc, page_number, cache=False)
 
             # Extract originating entity
-            if not data["originating_entity"]:
+            if not entity_found:
                 entity_match = re.search(r'Originating Entity\s*\|\s*(.+?)\s*\n', text)
-                data["originating_entity"] = entity_match.group(1).strip() if entity_match else "Not found"
+                entity_found = True
+                yield ('originating_entity', entity_match.group(1).strip() if entity_match else "Not found")
 
             # Extract drivers
             driver_matches = re.finditer(
@@ -34,7 +51,7 @@ def extract_manifest_data(pdf_path):
                 text
             )
             for match in driver_matches:
-                data["drivers"].append({
+                yield ('driver', {
                     "name": match.group(1).strip(),
                     "employee_id": match.group(2).strip()
                 })
@@ -44,7 +61,22 @@ def extract_manifest_data(pdf_path):
             for block in product_blocks[1:]:
                 product_data = extract_product_data(block)
                 if product_data:
-                    data["products"].append(product_data)
+                    yield ('product', product_data)
+
+def extract_manifest_data(pdf_path):
+    data = {
+        "originating_entity": None,
+        "drivers": [],
+        "products": []
+    }
+
+    for field, value in iter_manifest_data(pdf_path):
+        if field == 'originating_entity':
+            data["originating_entity"] = value
+        elif field == 'driver':
+            data["drivers"].append(value)
+        else:
+            data["products"].append(value)
 
     return data
 
@@ -77,10 +109,7 @@ def extract_product_data(block):
         product["type"] = detect_product_type(name_match.group(1))
 
     # THC, Weight, Supply
-    details_match = re.search(
-        r'THC: ([\d.]+)%?.*?Wgt: ([\d.]+ g).*?Supply: ([\d.]+) day\(s\)',
-        block, re.DOTALL
-    )
+    details_match = THC_WEIGHT_SUPPLY.search(block)
     if details_match:
         product.update({
             "thc": f"{details_match.group(1)}%",
@@ -97,6 +126,79 @@ def detect_product_type(text):
             return keyword
     return "Not Specified"
 
+def format_driver(driver):
+    return f"{driver['name']} ({driver['employee_id']})"
+
+def format_product(idx, product):
+    return {
+        'item_number': idx+1,
+        'package_id': product['package_id'],
+        'm_number': product['m_number'],
+        'name': product['product_name'],
+        'type': product['type'],
+        'strain': product['type'],  # Map type to strain
+        'days': product['supply_days'],
+        'weight': product['weight']
+    }
+
+def scan_manifest(pdf_path):
+    """
+    Scan a manifest and format the result for the React BuildingScan view.
+    Args:
+        pdf_path (str): Path to the PDF file.
+    Returns:
+        dict: company, drivers and items.
+    """
+    raw_data = extract_manifest_data(pdf_path)
+    
+    # Transform data for React compatibility
+    formatted_data = {
+        'company': raw_data['originating_entity'],
+        'drivers': " / ".join([format_driver(driver) for driver in raw_data['drivers']]),
+        'items': [format_product(idx, product) for idx, product in enumerate(raw_data['products'])]
+    }
+    return formatted_data
+
+def scan_manifest_events(pdf_path):
+    """
+    Scan a manifest as a stream of events in the scan_manifest() format,
+    replaying the cached result when there is one.
+    Args:
+        pdf_path (str): Path to the PDF file.
+    Yields:
+        dict: {"event": "company"}, {"event": "drivers"} with every driver found so
+        far, one {"event": "item"} per product, then {"event": "done"}.
+    """
+    start = time.perf_counter()
+    key = cache_key(file_digest(pdf_path), 'buildscan', version=PROCESSOR_VERSION)
+    formatted_data = shared_cache.get(key)
+    if formatted_data is not None:
+        yield {'event': 'company', 'company': formatted_data['company']}
+        yield {'event': 'drivers', 'drivers': formatted_data['drivers']}
+        for item in formatted_data['items']:
+            yield {'event': 'item', 'item': item}
+    else:
+        formatted_data = {'company': None, 'drivers': '', 'items': []}
+        drivers = []
+        try:
+            for field, value in iter_manifest_data(pdf_path):
+                if field == 'originating_entity':
+                    formatted_data['company'] = value
+                    yield {'event': 'company', 'company': value}
+                elif field == 'driver':
+                    drivers.append(format_driver(value))
+                    formatted_data['drivers'] = " / ".join(drivers)
+                    yield {'event': 'drivers', 'drivers': formatted_data['drivers']}
+                else:
+                    item = format_product(len(formatted_data['items']), value)
+                    formatted_data['items'].append(item)
+                    yield {'event': 'item', 'item': item}
+        except Exception as e:
+            yield {'event': 'error', 'error': str(e)}
+            return
+        shared_cache.put(key, formatted_data)
+    yield {'event': 'done', 'item_count': len(formatted_data['items']), 'seconds': round(time.perf_counter() - start, 3)}
+
 @buildscan_bp.route('/scan-pdf', methods=['POST'])
 def scan_pdf():
     if 'file' not in request.files:
@@ -112,30 +214,9 @@ def scan_pdf():
         file.save(file_path)
 
         try:
-            raw_data = extract_manifest_data(file_path)
-            
-            # Transform data for React compatibility
-            formatted_data = {
-                'company': raw_data['originating_entity'],
-                'drivers': " / ".join([
-                    f"{driver['name']} ({driver['employee_id']})" 
-                    for driver in raw_data['drivers']
-                ]),
-                'items': [
-                    {
-                        'item_number': idx+1,
-                        'package_id': product['package_id'],
-                        'm_number': product['m_number'],
-                        'name': product['product_name'],
-                        'type': product['type'],
-                        'strain': product['type'],  # Map type to strain
-                        'days': product['supply_days'],
-                        'weight': product['weight']
-                    }
-                    for idx, product in enumerate(raw_data['products'])
-                ]
-            }
-            
+            key = cache_key(file_digest(file_path), 'buildscan', version=PROCESSOR_VERSION)
+            formatted_data = shared_cache.get_or_compute(key, lambda: scan_manifest(file_path))
+
             os.remove(file_path)
             return jsonify(formatted_data), 200
 
@@ -143,3 +224,29 @@ def scan_pdf():
             return jsonify({'error': str(e)}), 500
 
     return jsonify({'error': 'Invalid file type'}), 400
+
+# Streaming variant of /scan-pdf: NDJSON by default, Server-Sent Events with ?format=sse
+@buildscan_bp.route('/scan-pdf/stream', methods=['POST'])
+def scan_pdf_stream():
+    if 'file' not in request.files:
+        return jsonify({'error': 'No file part'}), 400
+
+    file = request.files['file']
+    if file.filename == '':
+        return jsonify({'error': 'No selected file'}), 400
+
+    if not (file and allowed_file(file.filename)):
+        return jsonify({'error': 'Invalid file type'}), 400
+
+    filename = secure_filename(file.filename)
+    file_path = os.path.join(UPLOAD_FOLDER, filename)
+    file.save(file_path)
+
+    def events():
+        try:
+            yield from scan_manifest_events(file_path)
+        finally:
+            if os.path.exists(file_path):
+                os.remove(file_path)
+
+    return event_stream(events(), request.args.get('format', 'ndjson'))
@@ -0,0 +1,298 @@
+import os
+import json
+import time
+import uuid
+import shutil
+import socket
+import sqlite3
+import datetime
+import threading
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor
+from flask import Blueprint, request, jsonify
+from werkzeug.utils import secure_filename
+
+jobs_bp = Blueprint('jobs', __name__)
+
+JOBS_DB = os.environ.get('MORGO_JOBS_DB', 'jobs.db')
+# Jobs processed at once in this process; the rest wait in the queue
+JOB_WORKERS = int(os.environ.get('MORGO_JOB_WORKERS', 2))
+
+# Identifies this process, so jobs left running by a previous process can be told apart
+OWNER = f'{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex}'
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    kind TEXT NOT NULL,
+    file_path TEXT NOT NULL,
+    params TEXT NOT NULL,
+    status TEXT NOT NULL,
+    stage TEXT,
+    timings TEXT NOT NULL DEFAULT '{}',
+    result TEXT,
+    error TEXT,
+    owner TEXT,
+    created_at REAL NOT NULL,
+    started_at REAL,
+    finished_at REAL
+)
+"""
+
+
+def _owner_alive(owner):
+    # Only owners on this host can be checked; assume any other host is still working
+    host, pid, token = owner.split(':')
+    if host != socket.gethostname():
+        return True
+    if int(pid) == os.getpid():
+        return token == OWNER.rsplit(':', 1)[1]
+    try:
+        os.kill(int(pid), 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+def job_upload_folder(upload_folder, job_id):
+    # Each job's upload gets its own folder, so jobs for files with the same name do not share an input
+    return os.path.join(upload_folder, f'job-{job_id}')
+
+
+def _timestamp(value):
+    return datetime.datetime.fromtimestamp(value).isoformat(timespec='seconds') if value else None
+
+
+class JobStore:
+    """
+    Jobs persisted in a local SQLite table, so queued and running jobs survive a
+    restart of the process that accepted them.
+    """
+
+    def __init__(self, path=JOBS_DB):
+        self.path = path
+        self._ready = False
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=30)
+        conn.row_factory = sqlite3.Row
+        try:
+            if not self._ready:
+                # Created on first use, so importing the app does not touch the disk
+                with self._lock:
+                    conn.execute('PRAGMA journal_mode=WAL')
+                    conn.execute(SCHEMA)
+                    self._ready = True
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def create(self, kind, file_path, params, job_id=None):
+        """
+        Record a new queued job.
+        Args:
+            kind (str): Registered job kind, e.g. 'scan-pdf'.
+            file_path (str): Uploaded file the job processes.
+            params (dict): Form fields the handler needs.
+            job_id (str): Id to use, e.g. one the upload was saved under; a new one by default.
+        Returns:
+            str: The job id.
+        """
+        job_id = job_id or uuid.uuid4().hex
+        with self._connect() as conn:
+            conn.execute(
+                'INSERT INTO jobs (id, kind, file_path, params, status, created_at) VALUES (?, ?, ?, ?, ?, ?)',
+                (job_id, kind, file_path, json.dumps(params), 'queued', time.time())
+            )
+        return job_id
+
+    def claim(self, job_id):
+        """
+        Mark a queued job as running in this process.
+        Returns:
+            sqlite3.Row: The job, or None if another worker claimed it first.
+        """
+        with self._connect() as conn:
+            claimed = conn.execute(
+                "UPDATE jobs SET status = 'running', owner = ?, started_at = ?, stage = NULL, timings = '{}' "
+                "WHERE id = ? AND status = 'queued'",
+                (OWNER, time.time(), job_id)
+            ).rowcount
+            if not claimed:
+                return None
+            return conn.execute('SELECT * FROM jobs WHERE id = ?', (job_id,)).fetchone()
+
+    def update_progress(self, job_id, stage, timings):
+        with self._connect() as conn:
+            conn.execute('UPDATE jobs SET stage = ?, timings = ? WHERE id = ?', (stage, json.dumps(timings), job_id))
+
+    def finish(self, job_id, timings, result=None, error=None):
+        with self._connect() as conn:
+            conn.execute(
+                'UPDATE jobs SET status = ?, stage = NULL, timings = ?, result = ?, error = ?, finished_at = ? WHERE id = ?',
+                ('failed' if error else 'done', json.dumps(timings), json.dumps(result), error, time.time(), job_id)
+            )
+
+    def get(self, job_id):
+        with self._connect() as conn:
+            return conn.execute('SELECT * FROM jobs WHERE id = ?', (job_id,)).fetchone()
+
+    def requeue_unfinished(self):
+        """
+        Put jobs whose process died while running back in the queue.
+        Returns:
+            list: Ids of every queued job, including the re-queued ones.
+        """
+        with self._connect() as conn:
+            for row in conn.execute("SELECT id, owner FROM jobs WHERE status = 'running'").fetchall():
+                if not _owner_alive(row['owner']):
+                    conn.execute("UPDATE jobs SET status = 'queued', owner = NULL WHERE id = ? AND status = 'running'",
+                                 (row['id'],))
+            return [row['id'] for row in
+                    conn.execute("SELECT id FROM jobs WHERE status = 'queued' ORDER BY created_at").fetchall()]
+
+
+class JobQueue:
+    """
+    Runs registered job handlers on a bounded pool of worker threads.
+
+    A handler is called as handler(file_path, params, progress) and returns a
+    JSON-serializable result; it may call progress(stage) as it moves through
+    its stages, which records how long each stage took.
+    """
+
+    def __init__(self, store, workers=JOB_WORKERS):
+        self.store = store
+        self.handlers = {}
+        self._executor = ThreadPoolExecutor(max_workers=workers)
+        self._resumed = False
+        self._resume_lock = threading.Lock()
+
+    def register(self, kind, handler, upload_folder, allowed_extensions, validate=None):
+        """
+        Register a job kind accepted by POST /api/jobs/<kind>.
+        Args:
+            kind (str): Name of the job kind.
+            handler (callable): handler(file_path, params, progress) -> result.
+            upload_folder (str): Where uploads for this kind are saved.
+            allowed_extensions (set): Accepted upload extensions.
+            validate (callable): Optional validate(form) returning an error message or None.
+        """
+        self.handlers[kind] = {
+            'handler': handler,
+            'upload_folder': upload_folder,
+            'allowed_extensions': allowed_extensions,
+            'validate': validate,
+        }
+
+    def submit(self, kind, file_path, params, job_id=None):
+        job_id = self.store.create(kind, file_path, params, job_id)
+        self._executor.submit(self._run, job_id)
+        return job_id
+
+    def resume(self):
+        """
+        Queue every job left unfinished by a previous process. Call once the
+        handlers are registered; later calls do nothing.
+        """
+        with self._resume_lock:
+            if self._resumed:
+                return
+            self._resumed = True
+        for job_id in self.store.requeue_unfinished():
+            self._executor.submit(self._run, job_id)
+
+    def _run(self, job_id):
+        job = self.store.claim(job_id)
+        if job is None:
+            return
+
+        timings = {}
+        current = {'stage': None, 'started': time.perf_counter()}
+
+        def end_stage():
+            if current['stage']:
+                timings[current['stage']] = round(time.perf_counter() - current['started'], 3)
+
+        def progress(stage):
+            end_stage()
+            current['stage'] = stage
+            current['started'] = time.perf_counter()
+            self.store.update_progress(job_id, stage, timings)
+
+        try:
+            handler = self.handlers[job['kind']]['handler']
+            result = handler(job['file_path'], json.loads(job['params']), progress)
+            end_stage()
+            self.store.finish(job_id, timings, result=result)
+        except Exception as e:
+            end_stage()
+            print(f"#ERROR# job {job_id} ({job['kind']}) failed: {e}")
+            self.store.finish(job_id, timings, error=str(e))
+        finally:
+            upload_folder = os.path.dirname(job['file_path'])
+            if os.path.basename(upload_folder) == f'job-{job_id}':
+                shutil.rmtree(upload_folder, ignore_errors=True)
+
+
+job_queue = JobQueue(JobStore())
+
+
+@jobs_bp.route('/<kind>', methods=['POST'])
+def submit_job(kind):
+    registration = job_queue.handlers.get(kind)
+    if registration is None:
+        return jsonify({'error': f'Unknown job type: {kind}'}), 404
+
+    if 'file' not in request.files:
+        return jsonify({'error': 'No file part'}), 400
+
+    file = request.files['file']
+    if file.filename == '':
+        return jsonify({'error': 'No selected file'}), 400
+
+    if '.' not in file.filename or file.filename.rsplit('.', 1)[1].lower() not in registration['allowed_extensions']:
+        return jsonify({'error': 'Invalid file type'}), 400
+
+    if registration['validate']:
+        error = registration['validate'](request.form)
+        if error:
+            return jsonify({'error': error}), 400
+
+    job_id = uuid.uuid4().hex
+    upload_folder = job_upload_folder(registration['upload_folder'], job_id)
+    os.makedirs(upload_folder, exist_ok=True)
+    file_path = os.path.join(upload_folder, secure_filename(file.filename))
+    file.save(file_path)
+
+    job_queue.submit(kind, file_path, request.form.to_dict(), job_id)
+    return jsonify({'job_id': job_id, 'status': 'queued'}), 202
+
+
+@jobs_bp.route('/<job_id>', methods=['GET'])
+def job_status(job_id):
+    job = job_queue.store.get(job_id)
+    if job is None:
+        return jsonify({'error': 'Job not found'}), 404
+
+    now = time.time()
+    queued_until = job['started_at'] or now
+    return jsonify({
+        'job_id': job['id'],
+        'kind': job['kind'],
+        'status': job['status'],
+        'stage': job['stage'],
+        'created_at': _timestamp(job['created_at']),
+        'started_at': _timestamp(job['started_at']),
+        'finished_at': _timestamp(job['finished_at']),
+        'queued_seconds': round(queued_until - job['created_at'], 3),
+        'run_seconds': round((job['finished_at'] or now) - job['started_at'], 3) if job['started_at'] else None,
+        'timings': json.loads(job['timings']),
+        'result': json.loads(job['result']) if job['result'] else None,
+        'error': job['error'],
+    }), 200
@@ -1,8 +1,9 @@
 import os
-import csv
-import openpyxl
-from openpyxl.utils import get_column_letter
 from datetime import datetime
+from report_spec import load_spec
+
+# Bump when the produced workbook changes, so cached results are not reused
+PROCESSOR_VERSION = 1
 
 def process_metric_file(input_file, output_file):
     try:
@@ -10,61 +11,10 @@ def process_metric_file(input_file, output_file):
         if not os.path.exists(input_file):
             raise FileNotFoundError(f"Input file not found: {input_file}")
 
-        # Create a new workbook
-        wb = openpyxl.Workbook()
-        ws = wb.active
-
-        # Read the CSV file
+        # Streams the projected columns of reports/metric.json; nothing else in the export becomes a cell
         print(f"Reading CSV file: {input_file}")
-        with open(input_file, 'r', newline='', encoding='utf-8') as csvfile:
-            csv_reader = csv.reader(csvfile)
-            rows = list(csv_reader)  # Load all rows to verify structure
-            if not rows:
-                raise ValueError("CSV file is empty")
-            for row in rows:
-                ws.append(row)
-
-        # Verify worksheet has data
-        if ws.max_row < 1 or ws.max_column < 1:
-            raise ValueError("Worksheet is empty after loading CSV")
-
-        # Move data from column S to T
-        print("Moving data from column S to T")
-        for row in ws.iter_rows(min_row=1, max_row=ws.max_row, min_col=19, max_col=19):
-            for cell in row:
-                ws.cell(row=cell.row, column=20, value=cell.value)
-
-        # Delete columns S, P to K, and H to C
-        print("Deleting columns S, P to K, and H to C")
-        ws.delete_cols(19)  # Delete column S
-        ws.delete_cols(11, 6)  # Delete columns K to P
-        ws.delete_cols(3, 6)  # Delete columns C to H
-
-        # Rename column B
-        if ws['B1'].value == "Item":
-            print("Renaming column B from 'Item' to 'Description'")
-            ws['B1'].value = "Description"
-            ws['B1'].alignment = openpyxl.styles.Alignment(wrap_text=True)
-
-        # Rename column C
-        if ws['C1'].value == "Quantity":
-            print("Renaming column C from 'Quantity' to 'METRIC\\nQuantity'")
-            ws['C1'].value = "METRIC\nQuantity"
-            ws['C1'].alignment = openpyxl.styles.Alignment(wrap_text=True)
-
-        # Delete the last three columns (E, F, G)
-        print("Deleting last three columns")
-        if ws.max_column >= 3:
-            ws.delete_cols(ws.max_column - 2, 3)
-        else:
-            print("Warning: Not enough columns to delete last three")
-
-        # Add page number in the middle footer
-        ws.oddFooter.center.text = "Page &[Page]"
-
-        # Add current date in the middle header
-        current_date = datetime.now().strftime("%Y-%m-%d")
-        ws.oddHeader.center.text = f"Metric {current_date}"
+        spec = load_spec("metric")
+        rows = spec.rows(input_file)
 
         # Ensure output directory exists
         output_dir = os.path.dirname(output_file)
@@ -73,7 +23,8 @@ def process_metric_file(input_file, output_file):
 
         # Save the workbook as XLSX
         print(f"Saving output file: {output_file}")
-        wb.save(output_file)
+        current_date = datetime.now().strftime("%Y-%m-%d")
+        spec.write(rows, output_file, date=current_date)
 
         # Verify output file was created
         if not os.path.exists(output_file):
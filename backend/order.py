@@ -1,64 +1,100 @@
-import os
+import numpy as np
+import pandas as pd
 from openpyxl import load_workbook
-import math
 
-def process_order_file(file_path, num_of_days):
-    """Process order file and return vendor data"""
+# Columns read from the order export, found by header name
+ORDER_COLUMNS = ['ProductDesc', 'VendorName', 'PosQty', 'RemainingQty']
+# Products expected to sell out within this many days are listed
+SOLD_OUT_WITHIN_DAYS = 14
+# The header row sits below a short block of export details; it is looked for in the first rows
+HEADER_SEARCH_ROWS = 20
+
+
+def _location(sku):
+    sku = str(sku).strip() if sku is not None else ''
+    if sku[:1].isdigit():
+        return "Columbus"
+    return "Marengo" if sku[:1].lower() == 'm' else "Unknown"
+
+
+def read_order_columns(file_path):
+    """
+    Stream the order export and collect the columns the order report uses.
+    Args:
+        file_path (str): The exported .xlsx.
+    Returns:
+        tuple: ({column: numpy object array} for ORDER_COLUMNS, first product SKU or None).
+    """
+    workbook = load_workbook(file_path, read_only=True)
     try:
-        workbook = load_workbook(file_path)
-        sheet = workbook.active
-        sheet.delete_rows(1, 4)  # Remove first four rows
+        rows = workbook.active.iter_rows(values_only=True)
+        for number, row in enumerate(rows):
+            if number >= HEADER_SEARCH_ROWS:
+                raise ValueError(f"Header row with {', '.join(ORDER_COLUMNS)} not found in the first {HEADER_SEARCH_ROWS} rows")
+            headers = [str(value).strip() if value is not None else None for value in row]
+            if set(ORDER_COLUMNS) <= set(headers):
+                break
+        else:
+            raise ValueError(f"Header row with {', '.join(ORDER_COLUMNS)} not found")
 
-        product_sku = sheet['B2'].value
-        location = "Columbus" if product_sku[0].isdigit() else "Marengo" if product_sku[0].lower() == 'm' else "Unknown"
+        indices = [headers.index(column) for column in ORDER_COLUMNS]
+        # The store is told by the first SKU (column B when the export has no ProductSku header)
+        sku_index = headers.index('ProductSku') if 'ProductSku' in headers else 1
+        width = max(indices + [sku_index]) + 1
 
-        vendor_data = {}
-        column_indices = {
-            'ProductDesc': None,
-            'VendorName': None,
-            'PosQty': None,
-            'RemainingQty': None,
-            'ProductSku': None
-        }
+        values = [[] for _ in ORDER_COLUMNS]
+        first_sku = None
+        for row in rows:
+            if len(row) < width:
+                row = row + (None,) * (width - len(row))
+            if first_sku is None and row[sku_index] is not None:
+                first_sku = row[sku_index]
+            for column, index in zip(values, indices):
+                column.append(row[index])
+    finally:
+        workbook.close()
 
-        # vendor_data = {}
-        # column_indices = {
-        #     'ProductDesc': None,
-        #     'VendorName': None,
-        #     'PosQty': None,
-        #     'RemainingQty': None
-        # }
+    columns = {name: np.array(column, dtype=object) for name, column in zip(ORDER_COLUMNS, values)}
+    return columns, first_sku
 
-        # Identify column indices from headers
-        for cell in sheet[1]:
-            if cell.value in column_indices:
-                column_indices[cell.value] = cell.column - 1
 
-        # Process data rows
-        for row in sheet.iter_rows(min_row=2, values_only=True):
-            try:
-                product_desc = row[column_indices['ProductDesc']]
-                vendor_name = row[column_indices['VendorName']]
-                pos_qty = float(row[column_indices['PosQty']])
-                remaining_qty = float(row[column_indices['RemainingQty']])
-                
-                if pos_qty > 0 and remaining_qty >= 0:
-                    daily_sales = pos_qty / num_of_days
-                    days_until_sold_out = math.ceil(remaining_qty / daily_sales) if daily_sales > 0 else float('inf')
+def process_order_file(file_path, num_of_days):
+    """
+    Products expected to sell out within SOLD_OUT_WITHIN_DAYS, grouped by vendor.
+    Args:
+        file_path (str): The exported .xlsx.
+        num_of_days (int): Days of sales the export's PosQty covers.
+    Returns:
+        tuple: (vendor_data, location) where vendor_data maps each vendor, in the
+        order they first appear, to [{'name', 'daysUntilSoldOut', 'remainingQty'}]
+        in file order, and location is "Columbus", "Marengo" or "Unknown".
+    """
+    try:
+        if not num_of_days > 0:
+            raise ValueError(f"num_of_days must be positive, got {num_of_days}")
+        columns, first_sku = read_order_columns(file_path)
+        location = _location(first_sku)
 
-                    if days_until_sold_out <= 14:
-                        vendor_data.setdefault(vendor_name, []).append({
-                            'name': product_desc,
-                            'daysUntilSoldOut': days_until_sold_out,
-                            'remainingQty': remaining_qty
-                        })
+        # Quantities that are missing or not numbers become NaN and fail the checks below
+        pos_qty = pd.to_numeric(pd.Series(columns['PosQty']), errors='coerce').to_numpy(dtype=float)
+        remaining_qty = pd.to_numeric(pd.Series(columns['RemainingQty']), errors='coerce').to_numpy(dtype=float)
 
-            
-            except (TypeError, ValueError) as e:
-                continue  # Skip invalid rows
+        selling = (pos_qty > 0) & (remaining_qty >= 0)
+        daily_sales = pos_qty[selling] / num_of_days
+        days_until_sold_out = np.ceil(remaining_qty[selling] / daily_sales)
+        soon = days_until_sold_out <= SOLD_OUT_WITHIN_DAYS
+        rows = np.flatnonzero(selling)[soon]
 
-        return vendor_data, location
+        vendor_data = {}
+        for vendor_name, product_desc, days, remaining in zip(columns['VendorName'][rows], columns['ProductDesc'][rows],
+                                                              days_until_sold_out[soon], remaining_qty[rows]):
+            vendor_data.setdefault(vendor_name, []).append({
+                'name': product_desc,
+                'daysUntilSoldOut': int(days),
+                'remainingQty': float(remaining)
+            })
 
+        return vendor_data, location
 
     except Exception as e:
         raise Exception(f"Order processing error: {str(e)}")
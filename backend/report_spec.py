@@ -0,0 +1,299 @@
+import os
+import json
+import importlib.util
+from functools import lru_cache
+import numpy as np
+import pandas as pd
+import openpyxl
+from report_writer import ReportWriter
+
+# JSON report specs, one per report type, e.g. reports/weekly.json
+SPEC_FOLDER = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'reports')
+# Rows parsed at a time when a report can be written without sorting, so memory stays flat
+CHUNK_ROWS = int(os.environ.get('MORGO_REPORT_CHUNK_ROWS', 50000))
+# pandas' pyarrow CSV reader is multithreaded; it is used for sorted reports when pyarrow is installed
+CSV_ENGINE = os.environ.get('MORGO_CSV_ENGINE', 'pyarrow' if importlib.util.find_spec('pyarrow') else 'c')
+# Package IDs and other keys sorted as numbers; anything else sorts after them
+INTEGER_PATTERN = r"\s*[+-]?\d+\s*"
+
+
+@lru_cache(maxsize=None)
+def load_spec(name):
+    """
+    Load a report spec from SPEC_FOLDER.
+    Args:
+        name (str): Report type, e.g. "weekly".
+    Returns:
+        ReportSpec: The parsed spec.
+    """
+    with open(os.path.join(SPEC_FOLDER, f"{name}.json"), encoding="utf-8") as f:
+        return ReportSpec(json.load(f))
+
+
+def _key(header):
+    return str(header).strip().lower()
+
+
+def _as_number(values):
+    """Text values as numbers when every non-empty one is a number; otherwise unchanged."""
+    present = values.notna() & (values.astype("string").str.strip() != "")
+    numbers = pd.to_numeric(values.where(present), errors="coerce")
+    if numbers[present].notna().all():
+        return numbers
+    return values
+
+
+class ReportSpec:
+    """
+    One report described as data: the source columns it reads by header name,
+    rows it excludes, derived values, sort keys, empty count columns and print
+    setup. Only the columns a spec refers to are read from the export, rows are
+    excluded chunk by chunk as they are read, and reports without a sort are
+    written while the export is still being read.
+
+    Spec keys:
+        source: {"format": "csv" or "xlsx", "encoding", "header_search_rows"}.
+        columns: [{"source", "name", "derive": "last4", "type": "number"/"date",
+            "format" (for dates), "category", "style", "header_style"}], in sheet order.
+        exclude: [{"column", "equals" or "contains" (a regex), "ignore_case", "strip"}].
+        sort: [{"column", "ignore_case"} or {"column", "numeric": true}], most significant first.
+        append: {"columns": [names], "style", "header_style", "fill"}, empty
+            columns after the data; with fill, data rows get styled blank cells.
+        partition: {"column", "prefixes": {prefix: label}, "default": label},
+            how partitions() splits rows, e.g. by store.
+        header_style, style: Defaults for columns without their own; header
+            cells fall back to style too.
+        print_setup: Passed to report_writer.apply_print_setup.
+    Column references in exclude and sort use source header names, matched
+    without regard to case or surrounding spaces.
+    """
+
+    def __init__(self, spec):
+        self.name = spec.get("name")
+        self.source = spec.get("source", {"format": "csv"})
+        self.columns = spec["columns"]
+        self.exclude = spec.get("exclude", [])
+        self.sort = spec.get("sort", [])
+        self.append = spec.get("append", {})
+        self.print_setup = spec.get("print_setup", {})
+        self.partition = spec.get("partition")
+        self.header_style = spec.get("header_style")
+        self.style = spec.get("style")
+
+        referenced = [column["source"] for column in self.columns]
+        referenced += [rule["column"] for rule in self.exclude + self.sort]
+        if self.partition:
+            referenced.append(self.partition["column"])
+        # Every column the spec reads, once each, in first-mention order
+        self.sources = list(dict.fromkeys(referenced))
+
+    @property
+    def header(self):
+        return [column.get("name", column["source"]) for column in self.columns] + self.append.get("columns", [])
+
+    @property
+    def header_styles(self):
+        default = self.header_style or self.style
+        styles = [column.get("header_style", column.get("style", default)) for column in self.columns]
+        appended = self.append.get("header_style", self.append.get("style", default))
+        return styles + [appended] * len(self.append.get("columns", []))
+
+    @property
+    def row_styles(self):
+        styles = [column.get("style", self.style) for column in self.columns]
+        if self.append.get("fill"):
+            styles += [self.append.get("style", self.style)] * len(self.append["columns"])
+        return styles
+
+    def resolve(self, headers):
+        """
+        Match the spec's source columns to the export's header row.
+        Args:
+            headers (list): Header row of the export.
+        Returns:
+            dict: Spec source name -> header as it appears in the export.
+        """
+        present = {}
+        for header in headers:
+            if header is not None:
+                present.setdefault(_key(header), header)
+        missing = [source for source in self.sources if _key(source) not in present]
+        if missing:
+            raise ValueError(f"Missing columns in the report: {', '.join(missing)}")
+        return {source: present[_key(source)] for source in self.sources}
+
+    def rows(self, input_path):
+        """
+        Rows of the report's data columns in sheet order, without the header or
+        appended columns.
+        Args:
+            input_path (str): The export (CSV or .xlsx, as the spec's source says).
+        Returns:
+            iterator: Row value tuples.
+        """
+        for frame in self._frames(input_path):
+            yield from self._rows(frame)
+
+    def partitions(self, input_path):
+        """
+        Rows split by the spec's partition rule in one read of the export, e.g.
+        one group per store. Each group keeps the report's sort order.
+        Args:
+            input_path (str): The export.
+        Returns:
+            dict: Partition label -> list of row value tuples, in the order the
+            partition rule lists its labels. Only labels with rows are included,
+            except that an export with no rows gives the default label, empty.
+        """
+        rule = self.partition
+        labels = list(dict.fromkeys(list(rule.get("prefixes", {}).values()) + [rule["default"]]))
+        groups = {label: [] for label in labels}
+        for frame in self._frames(input_path):
+            values = frame[rule["column"]].astype("string")
+            assigned = np.full(len(frame), rule["default"], dtype=object)
+            unassigned = np.ones(len(frame), dtype=bool)
+            for prefix, label in rule.get("prefixes", {}).items():
+                matches = values.str.startswith(prefix).to_numpy(dtype=bool, na_value=False) & unassigned
+                assigned[matches] = label
+                unassigned &= ~matches
+            for label in labels:
+                groups[label].extend(self._rows(frame[assigned == label]))
+        produced = {label: rows for label, rows in groups.items() if rows}
+        return produced or {rule["default"]: []}
+
+    def write(self, rows, output_path, **context):
+        """
+        Write the report's header and rows to an .xlsx file.
+        Args:
+            rows (iterable): Row value tuples, e.g. from rows().
+            output_path (str): Where to save the workbook.
+            **context: Values for the print setup's header and footer placeholders.
+        """
+        writer = ReportWriter(self.print_setup, **context)
+        writer.append(self.header, self.header_styles)
+        styles = self.row_styles
+        blanks = [None] * (len(styles) - len(self.columns))
+        # Rows without styles are written as plain values
+        if not any(styles):
+            styles = None
+        for row in rows:
+            writer.append(list(row) + blanks, styles)
+        writer.save(output_path)
+
+    def _frames(self, input_path):
+        frames = (self._derive(self._filter(frame)) for frame in self._read(input_path))
+        if self.sort:
+            frames = [self._sorted(pd.concat(list(frames), ignore_index=True))]
+        return frames
+
+    def _rows(self, frame):
+        return zip(*(self._values(frame, column) for column in self.columns))
+
+    def _read(self, input_path):
+        if self.source.get("format") == "xlsx":
+            return self._read_xlsx(input_path)
+        return self._read_csv(input_path)
+
+    def _read_csv(self, input_path):
+        encoding = self.source.get("encoding", "utf-8-sig")
+        headers = pd.read_csv(input_path, nrows=0, encoding=encoding).columns
+        columns = self.resolve(headers)
+        # Every field is read as text, exactly as exported; types are applied per column later.
+        # Columns that repeat a few values on every row are read as categoricals.
+        dtypes = {header: str for header in columns.values()}
+        dtypes.update({columns[column["source"]]: "category" for column in self.columns if column.get("category")})
+        options = dict(usecols=list(dtypes), dtype=dtypes, keep_default_na=False, encoding=encoding)
+        if self.sort and CSV_ENGINE != "c":
+            frame = pd.read_csv(input_path, engine=CSV_ENGINE, **options)
+            yield frame.rename(columns={header: source for source, header in columns.items()})
+            return
+        with pd.read_csv(input_path, chunksize=CHUNK_ROWS, **options) as chunks:
+            for frame in chunks:
+                yield frame.rename(columns={header: source for source, header in columns.items()})
+
+    def _read_xlsx(self, input_path):
+        workbook = openpyxl.load_workbook(input_path, read_only=True)
+        try:
+            rows = workbook.active.iter_rows(values_only=True)
+            # The header is found by content, below any block of export details
+            search_rows = self.source.get("header_search_rows", 20)
+            wanted = {_key(source) for source in self.sources}
+            for number, row in enumerate(rows):
+                if number >= search_rows:
+                    raise ValueError(f"Header row with {', '.join(self.sources)} not found in the first {search_rows} rows")
+                if wanted <= {_key(value) for value in row if value is not None}:
+                    headers = [str(value).strip() if value is not None else None for value in row]
+                    break
+            else:
+                raise ValueError(f"Header row with {', '.join(self.sources)} not found")
+
+            columns = self.resolve(headers)
+            indices = {source: headers.index(header) for source, header in columns.items()}
+            width = max(indices.values()) + 1
+
+            chunk = []
+            for row in rows:
+                if not any(value is not None for value in row):
+                    continue
+                if len(row) < width:
+                    row = row + (None,) * (width - len(row))
+                chunk.append([row[index] for index in indices.values()])
+                if len(chunk) >= CHUNK_ROWS:
+                    yield pd.DataFrame(chunk, columns=list(indices), dtype=object)
+                    chunk = []
+            if chunk:
+                yield pd.DataFrame(chunk, columns=list(indices), dtype=object)
+        finally:
+            workbook.close()
+
+    def _filter(self, frame):
+        keep = np.ones(len(frame), dtype=bool)
+        for rule in self.exclude:
+            values = frame[rule["column"]].astype("string")
+            if rule.get("strip"):
+                values = values.str.strip()
+            if rule.get("ignore_case"):
+                values = values.str.lower()
+            if "contains" in rule:
+                excluded = values.str.contains(rule["contains"], regex=True)
+            else:
+                excluded = values == rule["equals"]
+            keep &= ~excluded.to_numpy(dtype=bool, na_value=False)
+        return frame if keep.all() else frame[keep]
+
+    def _derive(self, frame):
+        for column in self.columns:
+            if column.get("derive") == "last4":
+                values = frame[column["source"]]
+                last_4 = values.astype("string").str[-4:]
+                # Only text IDs are cut; anything else is kept as it is
+                is_text = values.map(lambda value: isinstance(value, str)).to_numpy(dtype=bool)
+                frame = frame.assign(**{column["source"]: values.where(~is_text, last_4.astype(object))})
+        return frame
+
+    def _sorted(self, frame):
+        keys = []
+        for rule in self.sort:
+            values = frame[rule["column"]].astype("string")
+            if rule.get("numeric"):
+                numeric = values.str.fullmatch(INTEGER_PATTERN).fillna(False)
+                numbers = pd.to_numeric(values.where(numeric), errors="coerce")
+                keys.append(numbers.to_numpy(dtype=float, na_value=np.inf))
+            else:
+                if rule.get("ignore_case"):
+                    values = values.str.lower()
+                keys.append(pd.factorize(values, sort=True)[0])
+        # np.lexsort sorts on the last key first and keeps file order for ties
+        order = np.lexsort(keys[::-1])
+        return frame.iloc[order]
+
+    def _values(self, frame, column):
+        values = frame[column["source"]]
+        if column.get("type") == "number":
+            values = _as_number(values)
+        elif column.get("type") == "date":
+            dates = pd.to_datetime(values.where(values != ""), format=column.get("format"), errors="coerce")
+            # Dates in another format are shown as exported rather than dropped
+            values = dates.dt.date.astype(object).where(dates.notna(), values)
+        values = values.astype(object)
+        return values.where(values.notna() & (values != ""), None).to_numpy()
@@ -0,0 +1,114 @@
+from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import NamedStyle, Font, Border, Side, Alignment, PatternFill
+from openpyxl.styles.fonts import DEFAULT_FONT
+from openpyxl.styles.borders import DEFAULT_BORDER
+from openpyxl.styles.fills import DEFAULT_EMPTY_FILL
+from openpyxl.worksheet.page import PageMargins
+
+THIN_BORDER = Border(left=Side(style='thin'), right=Side(style='thin'),
+                     top=Side(style='thin'), bottom=Side(style='thin'))
+
+# Cell styles shared by the reports, by name. Each workbook registers the ones it
+# uses once, and cells refer to them by name instead of carrying their own Font,
+# Border and Alignment objects. Anything a style leaves out is the workbook default.
+STYLES = {
+    "Count Header": dict(font=Font(bold=True, size=12), border=THIN_BORDER,
+                         fill=PatternFill(start_color="DDDDDD", end_color="DDDDDD", fill_type="solid")),
+    "Count Cell": dict(font=Font(bold=True, size=10), border=THIN_BORDER),
+    "Count Text": dict(font=Font(bold=True), border=THIN_BORDER,
+                       alignment=Alignment(horizontal='left', vertical='center')),
+    "Count Value": dict(font=Font(bold=True), border=THIN_BORDER,
+                        alignment=Alignment(horizontal='center', vertical='center')),
+    "Count Date": dict(font=Font(bold=True), border=THIN_BORDER, number_format='mm/dd/yyyy',
+                       alignment=Alignment(horizontal='center', vertical='center')),
+    "Wrapped Header": dict(alignment=Alignment(wrap_text=True)),
+}
+
+
+def use_style(workbook, name):
+    """
+    Register a named style from STYLES with a workbook the first time it is used.
+    Args:
+        workbook (openpyxl.Workbook): The workbook.
+        name (str): Key of STYLES.
+    Returns:
+        str: The style name, for cell.style.
+    """
+    if name not in workbook.named_styles:
+        definition = dict(font=DEFAULT_FONT, border=DEFAULT_BORDER, fill=DEFAULT_EMPTY_FILL)
+        definition.update(STYLES[name])
+        workbook.add_named_style(NamedStyle(name=name, **definition))
+    return name
+
+
+def apply_print_setup(sheet, setup, **context):
+    """
+    Apply a declarative print setup to a worksheet (regular or write-only).
+    Args:
+        sheet (Worksheet): The worksheet.
+        setup (dict): Any of orientation, title_rows, freeze_panes, column_widths
+            ({letter: width}), margins ({side: inches}), fit_to_width, fit_to_height,
+            header and footer ({"left"/"center"/"right": text}). Header and footer
+            text is formatted with the context, e.g. "{date}".
+        **context: Values for the header and footer placeholders.
+    """
+    if "orientation" in setup:
+        sheet.page_setup.orientation = setup["orientation"]
+    if "title_rows" in setup:
+        sheet.print_title_rows = setup["title_rows"]
+    if "freeze_panes" in setup:
+        sheet.freeze_panes = setup["freeze_panes"]
+    for letter, width in setup.get("column_widths", {}).items():
+        sheet.column_dimensions[letter].width = width
+    if "margins" in setup:
+        sheet.page_margins = PageMargins(**setup["margins"])
+    if "fit_to_width" in setup:
+        sheet.page_setup.fitToWidth = setup["fit_to_width"]
+    if "fit_to_height" in setup:
+        sheet.page_setup.fitToHeight = setup["fit_to_height"]
+    for part, header_footer in (("header", sheet.oddHeader), ("footer", sheet.oddFooter)):
+        for position, text in setup.get(part, {}).items():
+            getattr(header_footer, position).text = text.format(**context)
+
+
+class ReportWriter:
+    """
+    A single-sheet workbook written row by row through a write-only worksheet,
+    so memory stays flat however many rows are written. Cells are styled with
+    the named styles in STYLES.
+    """
+
+    def __init__(self, print_setup=None, **context):
+        self.workbook = Workbook(write_only=True)
+        self.sheet = self.workbook.create_sheet()
+        self._registered = set()
+        # Freeze panes and column widths are written before the first row, so set them up front
+        if print_setup:
+            apply_print_setup(self.sheet, print_setup, **context)
+
+    def append(self, values, styles=None):
+        """
+        Write one row.
+        Args:
+            values (iterable): Cell values.
+            styles (str or list): One style name for the whole row, or one per
+                column (None for an unstyled cell). Unstyled rows are written as plain values.
+        """
+        if styles is None:
+            self.sheet.append(values)
+            return
+        if isinstance(styles, str):
+            styles = [styles] * len(values)
+        row = []
+        for value, name in zip(values, styles):
+            cell = WriteOnlyCell(self.sheet, value=value)
+            if name is not None:
+                if name not in self._registered:
+                    self._registered.add(use_style(self.workbook, name))
+                cell.style = name
+            row.append(cell)
+        self.sheet.append(row)
+
+    def save(self, path):
+        self.workbook.save(path)
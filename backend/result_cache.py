@@ -0,0 +1,196 @@
+import os
+import json
+import hashlib
+import threading
+from concurrent.futures import Future
+
+CACHE_FOLDER = os.environ.get('MORGO_CACHE_DIR', 'CACHE')
+CACHE_MAX_BYTES = int(os.environ.get('MORGO_CACHE_MAX_BYTES', 256 * 1024 * 1024))
+
+
+def file_digest(file_path, chunk_size=1024 * 1024):
+    """
+    SHA-256 of a file's contents, read in chunks.
+    Args:
+        file_path (str): Path to the file.
+        chunk_size (int): Bytes read per chunk.
+    Returns:
+        str: Hex digest.
+    """
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def cache_key(content_digest, namespace, **params):
+    """
+    Build a cache key from an upload's digest, the endpoint and any parameters
+    that change the result (location, processor version, report date, ...).
+    Args:
+        content_digest (str): SHA-256 of the uploaded file.
+        namespace (str): Name of the processor producing the result.
+        **params: JSON-serializable parameters that affect the result.
+    Returns:
+        str: Hex digest identifying the result.
+    """
+    payload = json.dumps({'digest': content_digest, 'namespace': namespace, 'params': params},
+                         sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+class ResultCache:
+    """
+    Content-addressed cache of processor results stored as JSON files on local disk.
+
+    Entries are evicted least-recently-used first once the directory grows past
+    max_bytes. Concurrent requests for the same key wait on a single in-flight
+    computation instead of each running the processor.
+    """
+
+    def __init__(self, directory=CACHE_FOLDER, max_bytes=CACHE_MAX_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._inflight = {}
+
+    def _path(self, key):
+        return os.path.join(self.directory, f'{key}.json')
+
+    def get(self, key):
+        """
+        Look up a cached result and mark it as recently used.
+        Args:
+            key (str): Key from cache_key().
+        Returns:
+            The cached value, or None on a miss.
+        """
+        path = self._path(key)
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                value = json.load(f)
+            os.utime(path)
+            return value
+        except (FileNotFoundError, ValueError):
+            return None
+
+    def put(self, key, value):
+        """
+        Store a result, then evict old entries if the cache is over its size cap.
+        Args:
+            key (str): Key from cache_key().
+            value: JSON-serializable result.
+        """
+        # Created on first write, so importing the app does not touch the disk
+        os.makedirs(self.directory, exist_ok=True)
+        path = self._path(key)
+        tmp_path = f'{path}.{threading.get_ident()}.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(value, f)
+        os.replace(tmp_path, path)
+        self._evict()
+
+    def _evict(self):
+        entries = []
+        total = 0
+        for name in os.listdir(self.directory):
+            if not name.endswith('.json'):
+                continue
+            try:
+                stat = os.stat(os.path.join(self.directory, name))
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, name))
+            total += stat.st_size
+
+        entries.sort()
+        for _, size, name in entries:
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(os.path.join(self.directory, name))
+            except FileNotFoundError:
+                pass
+            total -= size
+
+    def get_or_compute(self, key, compute, validate=None, cacheable=None):
+        """
+        Return the cached result for key, computing it at most once across
+        concurrent callers.
+        Args:
+            key (str): Key from cache_key().
+            compute (callable): Produces the result on a miss.
+            validate (callable): Optional check that a cached result is still usable
+                (e.g. that its output file still exists); failing entries are recomputed.
+            cacheable (callable): Optional check that a fresh result should be stored
+                (e.g. that it is not an error payload).
+        Returns:
+            The cached or freshly computed result.
+        """
+        value = self.get(key)
+        if value is not None and (validate is None or validate(value)):
+            return value
+
+        with self._lock:
+            future = self._inflight.get(key)
+            leader = future is None
+            if leader:
+                future = Future()
+                self._inflight[key] = future
+
+        if not leader:
+            return future.result()
+
+        try:
+            # Another leader may have finished between our lookup and taking the lock
+            value = self.get(key)
+            if value is None or (validate is not None and not validate(value)):
+                value = compute()
+                if cacheable is None or cacheable(value):
+                    self.put(key, value)
+            future.set_result(value)
+            return value
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+
+    def get_or_compute_files(self, key, compute, folder):
+        """
+        get_or_compute for processors that write workbooks to a shared folder and
+        return their filenames. Output names repeat (per location and date, per
+        upload name), so a later upload can overwrite the file behind a cached
+        result; entries keep each file's SHA-256 and are only reused while the
+        files on disk still match.
+        Args:
+            key (str): Key from cache_key().
+            compute (callable): Writes the files and returns a filename or a list of filenames.
+            folder (str): Folder the files are written to.
+        Returns:
+            The cached or freshly computed filename(s).
+        """
+        def names(result):
+            return result if isinstance(result, list) else [result]
+
+        def digests(result):
+            paths = {name: os.path.join(folder, name) for name in names(result)}
+            return {name: file_digest(path) for name, path in paths.items() if os.path.exists(path)}
+
+        def compute_entry():
+            result = compute()
+            return {'result': result, 'sha256': digests(result)}
+
+        def complete(entry):
+            return isinstance(entry, dict) and set(entry.get('sha256', {})) == set(names(entry.get('result')))
+
+        def unchanged(entry):
+            return complete(entry) and digests(entry['result']) == entry['sha256']
+
+        return self.get_or_compute(key, compute_entry, validate=unchanged, cacheable=complete)['result']
+
+
+# Cache shared by the upload endpoints
+shared_cache = ResultCache()
@@ -0,0 +1,24 @@
+import json
+from flask import Response, stream_with_context
+
+
+def event_stream(events, fmt='ndjson'):
+    """
+    Stream events to the client as they are produced.
+    Args:
+        events (iterable): Event dicts, each with an "event" key naming its type.
+        fmt (str): 'ndjson' for one JSON object per line, or 'sse' for Server-Sent Events.
+    Returns:
+        flask.Response: A streamed response that is not buffered by proxies.
+    """
+    if fmt == 'sse':
+        body = (f"event: {event['event']}\ndata: {json.dumps(event)}\n\n" for event in events)
+        mimetype = 'text/event-stream'
+    else:
+        body = (json.dumps(event) + "\n" for event in events)
+        mimetype = 'application/x-ndjson'
+
+    response = Response(stream_with_context(body), mimetype=mimetype)
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers['X-Accel-Buffering'] = 'no'
+    return response
@@ -0,0 +1,216 @@
+"""
+Golden checks for the Excel reports built from reports/*.json.
+
+`record` runs each processor on a sample export and keeps the input and the
+workbook it produced; `check` runs the processors again on the kept inputs and
+compares cell values, cell styles and page setup with the recorded workbooks.
+Run it before and after changing a spec, report_spec.py or report_writer.py.
+Today's date in page headers is ignored.
+
+Goldens for all four reports are kept in reports/golden: the morning sample
+from MORNINGDROP, the first 100 packages of METRIC-IN/Metric.csv and small
+weekly and Dutchie exports. `check` uses them when no folder is given.
+
+The morning and metric workbooks are the original processors' output
+(`record --backend` on a checkout of the baseline commit). Weekly and Dutchie
+carry their intended changes on top of it: weekly drops rows whose expiration
+is "0" and writes real dates, and Dutchie splits the original workbook's rows
+into one workbook per store.
+
+Run from the backend directory (the exit status is 1 when a report differs):
+
+    python verify_reports.py check
+    python verify_reports.py record GOLDEN --morning inventory.xlsx --weekly weekly.csv --metric metric.csv --dutchie dutchie.csv
+    python verify_reports.py record GOLDEN --backend ../old-checkout/backend --morning inventory.xlsx
+    python verify_reports.py check GOLDEN
+
+Re-record reports/golden only for an intended change to a report's output,
+and bump that processor's PROCESSOR_VERSION with it.
+"""
+import os
+import re
+import sys
+import glob
+import shutil
+import argparse
+import tempfile
+import subprocess
+import openpyxl
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+# Goldens committed with the report specs
+GOLDEN_DIR = os.path.join(BACKEND_DIR, "reports", "golden")
+
+# How each processor is run from a scratch directory. The script prints each workbook it wrote
+# as OUTPUT:path, or OUTPUT:label=path when a report is split into several workbooks.
+RUNNERS = {
+    "morning": ("import os, MorningRUN\n"
+                "print('OUTPUT:' + os.path.join(MorningRUN.file_complete_folder,"
+                " MorningRUN.process_morning_file({input!r}, 'Marengo')))"),
+    "weekly": ("import os, WeeklyRUN\n"
+               "print('OUTPUT:' + os.path.join(WeeklyRUN.WEEKLYCOMPLETE_DIR, WeeklyRUN.process_weekly_file({input!r})))"),
+    "metric": ("import metric\n"
+               "metric.process_metric_file({input!r}, 'METRIC-OUT/metric.xlsx')\n"
+               "print('OUTPUT:METRIC-OUT/metric.xlsx')"),
+    # One workbook per store, labelled by the store in its name ({store}-Dutchie-{date}.xlsx)
+    "dutchie": ("import os, dutchie\n"
+                "os.makedirs('DUTCHIE-OUT', exist_ok=True)\n"
+                "for path in dutchie.process_dutchie_file({input!r}):\n"
+                "    print('OUTPUT:' + os.path.basename(path).split('-Dutchie-')[0] + '=' + path)"),
+}
+
+DATE_PATTERN = re.compile(r"\d{1,4}[./-]\d{1,2}[./-]\d{2,4}")
+
+
+def workbook_name(report, label=""):
+    return f"{report}-{label}" if label else report
+
+
+def golden_workbooks(golden_dir, report):
+    """
+    Returns:
+        list: Names (without .xlsx) of the report's recorded workbooks, e.g. ["dutchie-Columbus", "dutchie-Marengo"].
+    """
+    paths = glob.glob(os.path.join(golden_dir, f"{report}.xlsx")) + glob.glob(os.path.join(golden_dir, f"{report}-*.xlsx"))
+    return sorted(os.path.splitext(os.path.basename(path))[0] for path in paths)
+
+
+def run_report(report, input_path, output_dir, backend_dir=BACKEND_DIR):
+    """
+    Run a processor on a copy of an export (some processors delete their input).
+    Args:
+        report (str): Key of RUNNERS.
+        input_path (str): The export.
+        output_dir (str): Where to copy the workbooks the processor wrote, as
+            <report>.xlsx or <report>-<label>.xlsx.
+        backend_dir (str): Backend folder whose processors are run, e.g. an
+            older checkout's when recording what a report used to look like.
+    Returns:
+        list: Names of the copied workbooks, without .xlsx.
+    """
+    with tempfile.TemporaryDirectory() as scratch:
+        scratch_input = os.path.join(scratch, os.path.basename(input_path))
+        shutil.copy(input_path, scratch_input)
+        env = dict(os.environ, PYTHONPATH=backend_dir + os.pathsep + os.environ.get("PYTHONPATH", ""))
+        completed = subprocess.run([sys.executable, "-c", RUNNERS[report].format(input=scratch_input)],
+                                   cwd=scratch, env=env, capture_output=True, text=True)
+        outputs = [line[len("OUTPUT:"):] for line in completed.stdout.splitlines() if line.startswith("OUTPUT:")]
+        if completed.returncode != 0 or not outputs:
+            raise RuntimeError(f"{report} failed:\n{completed.stdout[-2000:]}{completed.stderr[-2000:]}")
+        names = []
+        for output in outputs:
+            label, _, path = output.rpartition("=")
+            names.append(workbook_name(report, label))
+            shutil.copy(os.path.join(scratch, path), os.path.join(output_dir, f"{names[-1]}.xlsx"))
+        return names
+
+
+def describe(path):
+    """
+    Everything a report is compared on: page setup, then one entry per cell.
+    Args:
+        path (str): The workbook.
+    Returns:
+        list: Comparable entries, page setup first.
+    """
+    workbook = openpyxl.load_workbook(path)
+    sheet = workbook.active
+    setup = {
+        "dimensions": (sheet.max_row, sheet.max_column),
+        "freeze_panes": sheet.freeze_panes,
+        "title_rows": sheet.print_title_rows,
+        "orientation": sheet.page_setup.orientation,
+        "fit": (sheet.page_setup.fitToWidth, sheet.page_setup.fitToHeight),
+        "margins": (sheet.page_margins.left, sheet.page_margins.right),
+        "widths": {letter: dimension.width for letter, dimension in sheet.column_dimensions.items()
+                   if dimension.customWidth},
+        "header_footer": [DATE_PATTERN.sub("<date>", part.text or "")
+                          for header_footer in (sheet.oddHeader, sheet.oddFooter)
+                          for part in (header_footer.left, header_footer.center, header_footer.right)],
+    }
+    entries = [("setup", setup)]
+    for row in sheet.iter_rows():
+        for cell in row:
+            fill = cell.fill.fgColor.rgb if cell.fill.fill_type else None
+            entries.append((cell.coordinate, cell.value, cell.number_format, cell.font.b, cell.font.sz,
+                            cell.border.left.style if cell.border.left else None,
+                            cell.alignment.horizontal, cell.alignment.vertical, cell.alignment.wrap_text, fill))
+    workbook.close()
+    return entries
+
+
+def compare(expected_path, actual_path):
+    """
+    Returns:
+        str: The first difference, or None when the workbooks match.
+    """
+    expected, actual = describe(expected_path), describe(actual_path)
+    for expected_entry, actual_entry in zip(expected, actual):
+        if expected_entry != actual_entry:
+            return f"expected {expected_entry}\n      got {actual_entry}"
+    if len(expected) != len(actual):
+        return f"expected {len(expected)} entries, got {len(actual)}"
+    return None
+
+
+def record(golden_dir, inputs, backend_dir=BACKEND_DIR):
+    os.makedirs(os.path.join(golden_dir, "inputs"), exist_ok=True)
+    for report, input_path in inputs.items():
+        kept_input = os.path.join(golden_dir, "inputs", f"{report}{os.path.splitext(input_path)[1]}")
+        # Re-recording from the kept input itself leaves it in place
+        if not (os.path.exists(kept_input) and os.path.samefile(input_path, kept_input)):
+            shutil.copy(input_path, kept_input)
+        # Drop workbooks from an earlier recording, e.g. a store the new sample no longer has
+        for name in golden_workbooks(golden_dir, report):
+            os.remove(os.path.join(golden_dir, f"{name}.xlsx"))
+        for name in run_report(report, kept_input, golden_dir, backend_dir):
+            print(f"recorded {name}")
+
+
+def check(golden_dir):
+    failures = 0
+    for report in RUNNERS:
+        kept_inputs = glob.glob(os.path.join(golden_dir, "inputs", f"{report}.*"))
+        if not kept_inputs:
+            print(f"{report}: no golden, skipped")
+            continue
+        expected = golden_workbooks(golden_dir, report)
+        with tempfile.TemporaryDirectory() as scratch:
+            actual = run_report(report, kept_inputs[0], scratch)
+            for name in sorted(set(expected) | set(actual)):
+                if name not in actual:
+                    difference = "no such workbook was produced"
+                elif name not in expected:
+                    difference = "workbook produced but not recorded"
+                else:
+                    difference = compare(os.path.join(golden_dir, f"{name}.xlsx"), os.path.join(scratch, f"{name}.xlsx"))
+                if difference:
+                    failures += 1
+                    print(f"{name}: DIFFERENT\n      {difference}")
+                else:
+                    print(f"{name}: same")
+    return 1 if failures else 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("command", choices=["record", "check"])
+    parser.add_argument("golden_dir", nargs="?", default=GOLDEN_DIR,
+                        help="Folder of goldens (default: reports/golden)")
+    for report in RUNNERS:
+        parser.add_argument(f"--{report}", help=f"Sample export for the {report} report (record only)")
+    parser.add_argument("--backend", default=BACKEND_DIR,
+                        help="Record with the processors of another checkout's backend folder (record only)")
+    args = parser.parse_args()
+
+    if args.command == "record":
+        inputs = {report: getattr(args, report) for report in RUNNERS if getattr(args, report)}
+        if not inputs:
+            parser.error("record needs at least one sample export")
+        record(args.golden_dir, inputs, os.path.abspath(args.backend))
+        return 0
+    return check(args.golden_dir)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,4 +1,9 @@
-from app import app
+import os
+from app import app, start_background_work
+
+# Under the debug reloader only the child process (WERKZEUG_RUN_MAIN) serves requests
+if __name__ != "__main__" or os.environ.get("WERKZEUG_RUN_MAIN") == "true":
+    start_background_work()
 
 if __name__ == "__main__":
-    app.run(debug=True)
+    app.run(debug=True)
\ No newline at end of file